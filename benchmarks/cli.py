@@ -0,0 +1,82 @@
+"""
+Time CLI commands end to end against the fake Redmine in tests/server.py.
+
+Each command runs in process through click's test runner with the server's
+URL in REDMINE_URL, once per --workers value, and reports wall time along
+with the requests and connections the server saw. --latency makes the local
+server behave like a remote one.
+
+    $ python benchmarks/cli.py --issues 5000 --latency 0.05 --workers 1,4,8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from click.testing import CliRunner
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from redmine.cli.main import cli  # noqa: E402
+from tests.server import FakeRedmine  # noqa: E402
+
+
+def commands(args):
+    return [
+        ["issues", "--limit", str(args.issues)],
+        ["issues", "--limit", str(args.issues), "--ndjson"],
+        ["times", "--group-by", "user,week", "--sum"],
+        ["list", "user"],
+        ["show", "1", "--no-pager"],
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--issues", type=int, default=2000)
+    parser.add_argument("--time-entries", type=int, default=5000)
+    parser.add_argument("--projects", type=int, default=20)
+    parser.add_argument("--journals", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds")
+    parser.add_argument("--workers", default="1,4", help="Comma separated")
+    args = parser.parse_args()
+
+    server = FakeRedmine(
+        latency=args.latency,
+        issues=args.issues,
+        projects=args.projects,
+        journals=args.journals,
+        time_entries=args.time_entries,
+    ).start()
+    runner = CliRunner()
+    env = {
+        "HOME": tempfile.mkdtemp(),
+        "REDMINE_URL": server.url,
+        "REDMINE_API_KEY": "API_KEY",
+    }
+
+    print(f"{'command':<44} {'workers':>7} {'seconds':>8} {'requests':>8} {'conns':>6}")
+    for workers in args.workers.split(","):
+        for command in commands(args):
+            server.counts.update(requests=0, connections=0)
+            start = time.perf_counter()
+            result = runner.invoke(
+                cli, ["--force", "--workers", workers, *command], env=env
+            )
+            elapsed = time.perf_counter() - start
+
+            if result.exit_code != 0:
+                print(f"{' '.join(command)} failed: {result.output[-200:]}")
+                continue
+
+            print(
+                f"{' '.join(command):<44.44} {workers:>7} {elapsed:>8.3f} "
+                f"{server.counts['requests']:>8} {server.counts['connections']:>6}"
+            )
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Synthetic payloads shaped like what Redmine's JSON API returns, for the
+benchmarks. Everything is deterministic so runs are comparable.
+"""
+import random
+
+STATUSES = [
+    {"id": i, "name": name}
+    for i, name in enumerate(
+        ["New", "In Progress", "Resolved", "Feedback", "Closed", "Rejected"], 1
+    )
+]
+
+PRIORITIES = [
+    {"id": i, "name": name}
+    for i, name in enumerate(["Low", "Normal", "High", "Urgent", "Immediate"], 1)
+]
+
+TRACKERS = [{"id": i, "name": n} for i, n in enumerate(["Bug", "Feature"], 1)]
+
+PROJECTS = [{"id": i, "name": f"Project {i}"} for i in range(1, 21)]
+
+USERS = {str(i): f"User {i}" for i in range(1, 201)}
+
+ACTIVITIES = [{"id": i, "name": n} for i, n in enumerate(["Design", "Dev"], 9)]
+
+WORDS = (
+    "the issue list shows wrong totals when filtered by version and sorted by "
+    "priority after the last upgrade of the server please check logs again"
+).split()
+
+
+def text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def ref(items, rng):
+    item = rng.choice(items)
+    return {"id": item["id"], "name": item["name"]}
+
+
+def user(rng):
+    user_id = rng.randint(1, len(USERS))
+    return {"id": user_id, "name": USERS[str(user_id)]}
+
+
+def journal(rng, number):
+    details = [
+        {
+            "property": "attr",
+            "name": "status_id",
+            "old_value": str(rng.choice(STATUSES)["id"]),
+            "new_value": str(rng.choice(STATUSES)["id"]),
+        },
+        {
+            "property": "attr",
+            "name": "priority_id",
+            "old_value": str(rng.choice(PRIORITIES)["id"]),
+            "new_value": str(rng.choice(PRIORITIES)["id"]),
+        },
+        {
+            "property": "attr",
+            "name": "assigned_to_id",
+            "old_value": str(rng.randint(1, len(USERS))),
+            "new_value": str(rng.randint(1, len(USERS))),
+        },
+        {"property": "attr", "name": "done_ratio", "new_value": "50"},
+        {"property": "attachment", "name": "12", "new_value": "trace.log"},
+        {"property": "cf", "name": "3", "new_value": "high"},
+    ]
+
+    return {
+        "id": number,
+        "user": user(rng),
+        "notes": text(rng, rng.randint(0, 60)),
+        "created_on": f"2020-03-{number % 28 + 1:02}T10:{number % 60:02}:00Z",
+        "details": rng.sample(details, rng.randint(1, len(details))),
+    }
+
+
+def issue(number, journals=0, seed=None):
+    rng = random.Random(number if seed is None else seed)
+
+    return {
+        "id": number,
+        "project": ref(PROJECTS, rng),
+        "tracker": ref(TRACKERS, rng),
+        "status": ref(STATUSES, rng),
+        "priority": ref(PRIORITIES, rng),
+        "author": user(rng),
+        "assigned_to": user(rng),
+        "subject": text(rng, rng.randint(4, 14)),
+        "description": text(rng, rng.randint(20, 200)),
+        "start_date": "2020-03-02",
+        "due_date": None,
+        "done_ratio": rng.choice([0, 10, 50, 100]),
+        "created_on": "2020-03-02T09:15:00Z",
+        "updated_on": "2020-03-20T16:40:00Z",
+        "journals": [journal(rng, j) for j in range(1, journals + 1)],
+    }
+
+
+def time_entry(number):
+    rng = random.Random(number)
+
+    return {
+        "id": number,
+        "project": ref(PROJECTS, rng),
+        "issue": {"id": rng.randint(1, 10000)},
+        "user": user(rng),
+        "activity": ref(ACTIVITIES, rng),
+        "hours": rng.choice([0.25, 0.5, 1.0, 1.5, 2.0, 4.0, 8.0]),
+        "comments": text(rng, rng.randint(0, 8)),
+        "spent_on": f"2020-03-{number % 28 + 1:02}",
+    }
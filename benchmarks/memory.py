@@ -0,0 +1,111 @@
+"""
+Memory and time to build model objects for a large export, with __slots__
+and with a per-instance __dict__ like the models used to have.
+
+The __dict__ variants are the same classes rebuilt without __slots__, given
+the statuses, priorities and users tables to keep per issue as Issue did.
+Payloads are built before measuring, so only the objects are counted.
+
+    $ python benchmarks/memory.py --issues 100000
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fixtures  # noqa: E402
+from redmine.issue import Issue  # noqa: E402
+from redmine.journal import Journal, JournalContext  # noqa: E402
+from redmine.time import Time  # noqa: E402
+
+TABLES = {
+    "statuses": fixtures.STATUSES,
+    "priorities": fixtures.PRIORITIES,
+    "users": fixtures.USERS,
+}
+
+
+def with_dict(cls, keep=()):
+    """ cls without __slots__, also storing the keep keyword arguments """
+    attrs = {
+        k: v
+        for k, v in vars(cls).items()
+        if k not in ("__slots__", "__dict__", "__weakref__") and k not in cls.__slots__
+    }
+    init = cls.__init__
+
+    def __init__(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        for name in keep:
+            setattr(self, name, kwargs.get(name))
+
+    attrs["__init__"] = __init__
+    return type(f"{cls.__name__}WithDict", (), attrs)
+
+
+def measure(build, payloads):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    objects = [build(p) for p in payloads]
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # Time a full collection with the objects alive, what GC pays repeatedly
+    start = time.perf_counter()
+    gc.collect()
+    collect = time.perf_counter() - start
+
+    del objects
+    return size, elapsed, collect
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--issues", type=int, default=100000)
+    args = parser.parse_args()
+
+    count = args.issues
+    issues = [fixtures.issue(i) for i in range(1, count + 1)]
+    for issue in issues:
+        del issue["journals"]
+    journals = fixtures.issue(1, journals=count)["journals"]
+    entries = [fixtures.time_entry(i) for i in range(1, count + 1)]
+
+    context = JournalContext(**TABLES)
+    IssueWithDict = with_dict(Issue, keep=TABLES)
+    JournalWithDict = with_dict(Journal)
+    TimeWithDict = with_dict(Time)
+
+    cases = [
+        ("Issue, __dict__", lambda p: IssueWithDict(**p, **TABLES), issues),
+        ("Issue, __slots__", lambda p: Issue(**p, context=context), issues),
+        (
+            "Journal, __dict__",
+            lambda p: JournalWithDict(**p, context=context),
+            journals,
+        ),
+        ("Journal, __slots__", lambda p: Journal(**p, context=context), journals),
+        ("Time, __dict__", lambda p: TimeWithDict(**p), entries),
+        ("Time, __slots__", lambda p: Time(**p), entries),
+    ]
+
+    print(
+        f"{'model':<20} {'objects':>8} {'MB':>8} {'bytes each':>10} "
+        f"{'build s':>8} {'gc s':>6}"
+    )
+    for name, build, payloads in cases:
+        size, elapsed, collect = measure(build, payloads)
+        print(
+            f"{name:<20} {len(payloads):>8} {size / 1e6:>8.1f} "
+            f"{size / len(payloads):>10.0f} {elapsed:>8.3f} {collect:>6.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
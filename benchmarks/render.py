@@ -0,0 +1,263 @@
+"""
+Throughput of the formatters behind issues, show and times.
+
+Every case renders synthetic payloads (see fixtures.py) at a few sizes and
+reports units rendered per second plus the time per unit, which stays flat
+when a formatter scales linearly.
+
+Rates from different machines can't be compared, so --against measures a
+git revision's redmine package in the same run, alternating rounds with the
+working tree, and reports the ratio of each rate to that revision's. Even
+then a busy or shared machine easily moves rates by half, so --check (exit
+with 1 when a case got slower than the tolerance allows) is only worth using
+on a quiet one.
+
+    $ python benchmarks/render.py
+    $ python benchmarks/render.py --against HEAD~1 --check
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The redmine package to measure, another revision's with --against
+sys.path.insert(0, os.getenv("BENCH_SOURCE") or ROOT)
+
+import fixtures  # noqa: E402
+from redmine.issue import Issue  # noqa: E402
+from redmine.journal import Journal, JournalContext, render_journals  # noqa: E402
+from redmine.table import ISSUES, TIMES, Table  # noqa: E402
+from redmine.time import Time  # noqa: E402
+
+CONTEXT = {
+    "statuses": fixtures.STATUSES,
+    "priorities": fixtures.PRIORITIES,
+    "users": fixtures.USERS,
+}
+
+# What Redmine.journal_context builds once per run of the CLI
+JOURNAL_CONTEXT = JournalContext(**CONTEXT)
+
+
+def issues(size):
+    payloads = [fixtures.issue(i) for i in range(1, size + 1)]
+    return lambda: [Issue(**p) for p in payloads]
+
+
+def issue_with_journals(size):
+    payload = fixtures.issue(1, journals=size)
+    return lambda: [Issue(**payload, **CONTEXT)]
+
+
+def journals(size):
+    payloads = fixtures.issue(1, journals=size)["journals"]
+    return lambda: [Journal(**j, context=JOURNAL_CONTEXT) for j in payloads]
+
+
+def issue_payloads(size):
+    payloads = [fixtures.issue(i) for i in range(1, size + 1)]
+    return lambda: [payloads]
+
+
+def time_entry_payloads(size):
+    payloads = [fixtures.time_entry(i) for i in range(1, size + 1)]
+    return lambda: [payloads]
+
+
+def table(columns):
+    """ Render every row, as the issues and times commands do """
+    return lambda rows: sum(1 for _ in Table(columns).render(rows))
+
+
+def journal_lists(size):
+    return lambda: [fixtures.issue(1, journals=size)["journals"]]
+
+
+def time_entries(size):
+    payloads = [fixtures.time_entry(i) for i in range(1, size + 1)]
+    return lambda: [Time(**p) for p in payloads]
+
+
+# Case name, what to render, how to prepare it per size and the size option
+CASES = [
+    ("Issue.as_row", lambda i: i.as_row(), issues, "rows"),
+    ("Issue.get_header", lambda i: i.get_header(), issues, "rows"),
+    ("Issue.get_journals", lambda i: i.get_journals(), issue_with_journals, "journals"),
+    ("Journal.get_details", lambda j: j.get_details(), journals, "journals"),
+    (
+        "render_journals",
+        lambda js: render_journals(js, JOURNAL_CONTEXT),
+        journal_lists,
+        "journals",
+    ),
+    ("Time.__str__", str, time_entries, "rows"),
+    ("Table, issues", table(ISSUES), issue_payloads, "rows"),
+    ("Table, times", table(TIMES), time_entry_payloads, "rows"),
+]
+
+
+def best_of(repeat, prepare, run):
+    best = None
+    for _ in range(repeat):
+        items = prepare()
+        # Like timeit, keep collections from landing in random runs
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run(items)
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def measure(render, prepare, size, repeat):
+    """ Rate and seconds per unit, a unit being a row or a journal """
+
+    def run(items):
+        for item in items:
+            render(item)
+
+    elapsed = best_of(repeat, prepare(size), run)
+    return size / elapsed, elapsed / size
+
+
+def rates(sizes, repeat, progress=False):
+    """ Units per second and seconds per unit of every case and size """
+    results = {}
+    for name, render, prepare, size_option in CASES:
+        for size in sizes[size_option]:
+            rate, per_unit = measure(render, prepare, size, repeat)
+            results[f"{name} {size}"] = rate
+            if progress:
+                print(
+                    f"{name:<22} {size:>6} {rate:>12,.0f} {per_unit * 1e6:>8.2f} us"
+                )
+
+    return results
+
+
+def export(rev, directory):
+    """ Extract the redmine package as of rev into directory """
+    archive = subprocess.run(
+        ["git", "archive", rev, "redmine"],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        check=True,
+    ).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(directory)
+
+
+def measure_source(source, args):
+    """ rates() of the redmine package under source, None if it can't run """
+    result = subprocess.run(
+        [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--json",
+            f"--rows={args.rows}",
+            f"--journals={args.journals}",
+            f"--repeat={args.repeat}",
+        ],
+        env=dict(os.environ, BENCH_SOURCE=source),
+        stdout=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    # i.e a revision from before a module the cases import
+    if result.returncode != 0:
+        return None
+
+    return json.loads(result.stdout)
+
+
+def compare(args):
+    """ Print current rates against rev's, return the cases that regressed """
+    base, current = {}, {}
+    with tempfile.TemporaryDirectory() as directory:
+        export(args.against, directory)
+        sides = [(directory, base), (ROOT, current)]
+
+        # Alternate so drift in the machine's speed hits both sides alike
+        for _ in range(args.rounds):
+            for source, best in list(sides):
+                results = measure_source(source, args)
+                if results is None and source == ROOT:
+                    sys.exit("Benchmarks failed to run against the working tree")
+                if results is None:
+                    print(f"{args.against} can't run these benchmarks, skipping it")
+                    sides.remove((source, best))
+                    continue
+
+                for key, rate in results.items():
+                    best[key] = max(rate, best.get(key, 0))
+
+    regressions = []
+    rev = args.against
+    print(f"{'case':<22} {'size':>6} {rev:>12.12} {'current':>12} {'ratio':>6}")
+    for key, rate in current.items():
+        name, size = key.rsplit(" ", 1)
+        if key not in base:
+            print(f"{name:<22} {size:>6} {'-':>12} {rate:>12,.0f}")
+            continue
+
+        ratio = rate / base[key]
+        mark = ""
+        if ratio < 1 - args.tolerance:
+            regressions.append(key)
+            mark = "  slower"
+        print(
+            f"{name:<22} {size:>6} {base[key]:>12,.0f} {rate:>12,.0f} "
+            f"{ratio:>6.2f}{mark}"
+        )
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", default="1000,10000", help="Rows to render")
+    parser.add_argument("--journals", default="10,100,1000", help="Journals per issue")
+    parser.add_argument("--repeat", type=int, default=5, help="Best of this many")
+    parser.add_argument("--against", metavar="REV", help="Git revision to compare to")
+    parser.add_argument("--rounds", type=int, default=2, help="Runs of each side")
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--check", action="store_true", help="Fail on regressions")
+    parser.add_argument("--json", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.check and not args.against:
+        parser.error("--check needs a revision to compare to, see --against")
+
+    sizes = {
+        "rows": [int(n) for n in args.rows.split(",")],
+        "journals": [int(n) for n in args.journals.split(",")],
+    }
+
+    if args.json:
+        print(json.dumps(rates(sizes, args.repeat)))
+        return
+
+    if not args.against:
+        print(f"{'case':<22} {'size':>6} {'units/s':>12} {'per unit':>11}")
+        rates(sizes, args.repeat, progress=True)
+        return
+
+    regressions = compare(args)
+    if args.check and regressions:
+        print(f"\n{len(regressions)} regressions: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Compare one-connection-per-request against the pooled keep-alive session.
+
+Runs a membership crawl (one GET per project) and a multi-issue update (one
+PUT per issue) against a local HTTP/1.1 server, first with bare
+requests.get/put calls like the client used to make and then through
+Redmine's session. The server counts accepted connections, which is the
+number of handshakes each strategy pays for.
+
+    $ python benchmarks/session.py --projects 600 --issues 500
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from redmine.redmine import Redmine  # noqa: E402
+from tests.server import FakeRedmine  # noqa: E402
+
+
+def measure(server, label, func, count):
+    server.counts["connections"] = 0
+    start = time.perf_counter()
+    for i in range(1, count + 1):
+        func(i)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<32} {count:>6} requests {elapsed:>8.3f}s "
+        f"{count / elapsed:>9.1f} req/s {server.counts['connections']:>6} connections"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--projects", type=int, default=300)
+    parser.add_argument("--issues", type=int, default=300)
+    args = parser.parse_args()
+
+    server = FakeRedmine(projects=args.projects, issues=args.issues).start()
+    url = f"{server.url}/"
+
+    os.environ["HOME"] = tempfile.mkdtemp()
+    redmine = Redmine(server.url, "API_KEY")
+    headers = redmine.auth_header
+
+    measure(
+        server,
+        "memberships, requests.get",
+        lambda i: requests.get(
+            f"{url}projects/{i}/memberships.json", headers=headers
+        ).json(),
+        args.projects,
+    )
+    measure(
+        server,
+        "memberships, session",
+        lambda i: redmine.fetch(f"projects/{i}/memberships"),
+        args.projects,
+    )
+    measure(
+        server,
+        "update, requests.put",
+        lambda i: requests.put(
+            f"{url}issues/{i}.json", json={"issue": {"notes": "x"}}, headers=headers
+        ),
+        args.issues,
+    )
+    measure(
+        server,
+        "update, session",
+        lambda i: redmine.update_issue(i, note="x"),
+        args.issues,
+    )
+
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 class Activity:
+    __slots__ = ("id", "name")
+
     def __init__(self, **kwargs):
         self.id = kwargs.get("id")
         self.name = kwargs.get("name")
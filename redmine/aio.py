@@ -0,0 +1,404 @@
+"""
+Asyncio counterpart of Redmine, for embedding in asyncio services: the same
+methods as coroutines (and async iterators for collections) over one aiohttp
+session, with at most concurrency requests in flight.
+
+    async with AsyncRedmine(url, api_key, concurrency=50) as redmine:
+        async for issue in redmine.iter_issues(status="open"):
+            ...
+
+aiohttp is optional, install it with pip install redminecli[async].
+"""
+import asyncio
+import json
+import os
+import shutil
+from itertools import islice
+from urllib.parse import urljoin
+
+from redmine import cache as cache_policy
+from redmine.redmine import PAGE_SIZE, Page, Redmine
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+async def gather(aws):
+    """ asyncio.gather, cancelling what is left as soon as one of aws fails """
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+class AsyncRedmine:
+    # Same cache directory, file layout and payloads as Redmine, so both
+    # clients can share cached resources.
+    cache_file = Redmine.cache_file
+    set_cache = Redmine.set_cache
+    read_cache = Redmine.read_cache
+    evict = Redmine.evict
+    validators_file = Redmine.validators_file
+    read_validators = Redmine.read_validators
+    set_validators = Redmine.set_validators
+    conditional_headers = staticmethod(Redmine.conditional_headers)
+    membership_names = staticmethod(Redmine.membership_names)
+    issue_query = staticmethod(Redmine.issue_query)
+    update_payload = staticmethod(Redmine.update_payload)
+    create_payload = staticmethod(Redmine.create_payload)
+    time_entry_payload = staticmethod(Redmine.time_entry_payload)
+
+    def __init__(
+        self, url, api_key, ssl_verify=True, invalidate_cache=False, concurrency=10
+    ):
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncRedmine requires aiohttp: pip install redminecli[async]"
+            )
+
+        self.url = url
+        self.auth_header = {"X-Redmine-API-Key": api_key}
+        self.ssl_verify = ssl_verify
+        self.concurrency = concurrency
+
+        namespace = cache_policy.namespace(url, api_key)
+        self.cache_dir = os.path.join(os.getenv("HOME"), ".cache/redmine", namespace)
+
+        if invalidate_cache:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Created on first request, from inside the event loop
+        self._session = None
+        self._semaphore = None
+        self._refreshing = {}
+
+    def __repr__(self):
+        return f"AsyncRedmine({self.url})"
+
+    def __str__(self):
+        return repr(self)
+
+    async def __aenter__(self):
+        self.open()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def open(self):
+        if self._session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.concurrency, **({} if self.ssl_verify else {"ssl": False})
+            )
+            self._session = aiohttp.ClientSession(
+                headers=self.auth_header, connector=connector
+            )
+            # Requests wait for a slot here rather than in the connector, so
+            # a cancelled caller never holds a connection it hasn't used.
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+
+        return self._session
+
+    async def close(self):
+        """ Let background refreshes finish writing, then close connections """
+        await asyncio.gather(*self._refreshing.values(), return_exceptions=True)
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def in_thread(self, func, *args):
+        """ Run blocking file I/O (i.e on the cache) off the event loop """
+        return await asyncio.get_event_loop().run_in_executor(None, func, *args)
+
+    async def request(self, method, url, **kwargs):
+        """ Return the response and its decoded body, None if it has none """
+        session = self.open()
+
+        async with self._semaphore:
+            async with session.request(method, url, **kwargs) as resp:
+                resp.raise_for_status()
+                # 204 (i.e updates) and 304 answers have no body
+                body = await resp.read()
+
+        return resp, json.loads(body) if body else None
+
+    async def fetch(self, resource, headers=None, **kwargs):
+        # Unlike requests, aiohttp rejects None and bool parameters
+        params = {"limit": PAGE_SIZE, **kwargs}
+        params = {k: str(v) for k, v in params.items() if v is not None}
+        resp, data = await self.request(
+            "GET",
+            urljoin(self.url.rstrip("/") + "/", "{}.json".format(resource)),
+            params=params,
+            headers=headers,
+        )
+
+        # Only conditional requests can be answered with 304
+        if resp.status == 304:
+            return None
+
+        return Page(
+            data,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+        )
+
+    async def iter_resource(
+        self, resource, limit=None, offset=0, ordered=True, **kwargs
+    ):
+        """ Yield items of a collection, fetching pages as they're consumed """
+        rname = resource.split("/")[-1]
+        limit = int(limit) if limit is not None else None
+        if limit is not None and limit <= 0:
+            return
+
+        start = offset
+        page_size = PAGE_SIZE if limit is None else min(PAGE_SIZE, limit)
+        page = await self.fetch(resource, offset=offset, limit=page_size, **kwargs)
+        items = page.get(rname, [])
+
+        for item in items:
+            yield item
+
+        offset += len(items)
+
+        # Non paginated resources (i.e issue_statuses) have no total_count
+        end = page.get("total_count", 0)
+        if limit is not None:
+            end = min(end, start + limit)
+        if not items or offset >= end:
+            return
+
+        # Step by the page size the server actually answered with, in case it
+        # caps pages below PAGE_SIZE.
+        pages = self._iter_pages(resource, offset, end, len(items), ordered, **kwargs)
+        async for item in pages:
+            yield item
+
+    async def _iter_pages(self, resource, start, end, step, ordered, **kwargs):
+        rname = resource.split("/")[-1]
+
+        async def fetch_page(page_offset):
+            page_size = min(step, end - page_offset)
+            page = await self.fetch(
+                resource, offset=page_offset, limit=page_size, **kwargs
+            )
+            return page.get(rname, [])
+
+        # Keep at most two pages per request slot scheduled so memory stays
+        # bounded when the consumer is slower than the network.
+        offsets = iter(range(start, end, step))
+        pending = [
+            asyncio.ensure_future(fetch_page(o))
+            for o in islice(offsets, self.concurrency * 2)
+        ]
+
+        try:
+            while pending:
+                if ordered:
+                    done = [pending.pop(0)]
+                else:
+                    done, _ = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    pending = [f for f in pending if f not in done]
+
+                for future in done:
+                    items = await future
+                    for page_offset in islice(offsets, 1):
+                        pending.append(asyncio.ensure_future(fetch_page(page_offset)))
+
+                    for item in items:
+                        yield item
+        finally:
+            # Closing the iterator early (or cancelling its consumer) drops
+            # the pages still in flight.
+            for future in pending:
+                future.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def get(self, resource, cache=True, **kwargs):
+        rname = resource.split("/")[-1]
+        cache_file = self.cache_file(resource, **kwargs)
+        cache_state = await self.in_thread(cache_policy.state, cache_file, resource)
+
+        if cache_state in (cache_policy.FRESH, cache_policy.STALE):
+            data = await self.in_thread(self.read_cache, cache_file)
+            if cache_state == cache_policy.STALE and cache:
+                self.refresh_later(
+                    cache_file, self.revalidate, cache_file, resource, **kwargs
+                )
+        else:
+            if cache_state == cache_policy.EXPIRED:
+                await self.in_thread(self.evict, cache_file)
+            data = await self.refresh(cache_file, resource, cache=cache, **kwargs)
+
+        return data[rname]
+
+    async def refresh(self, cache_file, resource, cache=True, **kwargs):
+        rname = resource.split("/")[-1]
+        data = await self.fetch(resource, **kwargs)
+        if rname not in data:
+            return data
+
+        pages = [data]
+        offsets = range(len(data[rname]), data.get("total_count", 0), PAGE_SIZE)
+        if data[rname] and offsets:
+            pages.extend(
+                await gather(self.fetch(resource, offset=o, **kwargs) for o in offsets)
+            )
+            for page in pages[1:]:
+                data[rname].extend(page.get(rname, []))
+
+        if cache:
+            await self.in_thread(self.set_cache, cache_file, data)
+            await self.in_thread(self.set_validators, cache_file, pages, [0, *offsets])
+
+        return data
+
+    async def revalidate(self, cache_file, resource, **kwargs):
+        """ Refresh a cached resource, downloading it only if it changed """
+        validators = await self.in_thread(self.read_validators, cache_file)
+        if validators:
+            unchanged = await gather(
+                self.not_modified(resource, validator, **kwargs)
+                for validator in validators
+            )
+            if all(unchanged):
+                # 304 for every page: the cached copy is fresh for another TTL
+                await self.in_thread(os.utime, cache_file)
+                return await self.in_thread(self.read_cache, cache_file)
+
+        return await self.refresh(cache_file, resource, **kwargs)
+
+    async def not_modified(self, resource, validator, **kwargs):
+        """ Whether the page validator was stored for is still the same """
+        headers = self.conditional_headers(validator)
+        offset = validator["offset"]
+        page = await self.fetch(resource, headers=headers, offset=offset, **kwargs)
+        return page is None
+
+    def refresh_later(self, cache_file, func, *args, **kwargs):
+        """ Run func in a task unless cache_file is already refreshing """
+        if cache_file in self._refreshing:
+            return
+
+        async def target():
+            try:
+                await func(*args, **kwargs)
+            except aiohttp.ClientError:
+                # Keep serving the stale copy, the next call will try again
+                pass
+            finally:
+                self._refreshing.pop(cache_file, None)
+
+        self._refreshing[cache_file] = asyncio.ensure_future(target())
+
+    async def get_users(self):
+        cache_file = os.path.join(self.cache_dir, "users.json")
+        cache_state = await self.in_thread(cache_policy.state, cache_file, "users")
+
+        if cache_state in (cache_policy.FRESH, cache_policy.STALE):
+            users = await self.in_thread(self.read_cache, cache_file)
+            if cache_state == cache_policy.STALE:
+                self.refresh_later(cache_file, self.sync_users)
+        else:
+            users = await self.sync_users()
+
+        return users
+
+    async def sync_users(self):
+        """ Fetch the user directory, from memberships unless we're admin """
+        try:
+            users = await self.admin_users()
+        except aiohttp.ClientResponseError as e:
+            if e.status != 403:
+                raise
+            users = await self.crawl_users()
+
+        cache_file = os.path.join(self.cache_dir, "users.json")
+        await self.in_thread(self.set_cache, cache_file, users)
+
+        return users
+
+    async def admin_users(self):
+        # Only admins can list users and groups. Redmine answers 403 otherwise.
+        users = {
+            str(u["id"]): f"{u['firstname']} {u['lastname']}"
+            async for u in self.iter_resource("users")
+        }
+        users.update(
+            {str(g["id"]): g["name"] async for g in self.iter_resource("groups")}
+        )
+
+        return users
+
+    async def crawl_users(self, projects=None):
+        if projects is None:
+            projects = [p async for p in self.iter_resource("projects")]
+
+        async def get_memberships(project):
+            resource = "projects/{}/memberships".format(project["id"])
+            return [m async for m in self.iter_resource(resource)]
+
+        users = {}
+        for memberships in await gather(get_memberships(p) for p in projects):
+            users.update(self.membership_names(memberships))
+
+        return users
+
+    def iter_issues(self, **kwargs):
+        """ Yield at most limit issues matching the issues command filters """
+        limit = kwargs.get("limit")
+        if kwargs.get("issue_id"):
+            limit = None
+
+        return self.iter_resource("issues", limit=limit, **self.issue_query(**kwargs))
+
+    async def get_issues(self, **kwargs):
+        return [issue async for issue in self.iter_issues(**kwargs)]
+
+    async def get_issue(self, issue_id, journals):
+        query_params = {}
+        if journals:
+            query_params["include"] = "journals"
+
+        _, data = await self.request(
+            "GET", f"{self.url}/issues/{issue_id}.json", params=query_params
+        )
+
+        return data["issue"]
+
+    async def update_issue(self, issue_id, **kwargs):
+        await self.request(
+            "PUT",
+            f"{self.url}/issues/{issue_id}.json",
+            json=self.update_payload(**kwargs),
+        )
+
+        return True
+
+    async def create_issue(self, **kwargs):
+        _, data = await self.request(
+            "POST", f"{self.url}/issues.json", json=self.create_payload(**kwargs)
+        )
+
+        return data["issue"]
+
+    async def create_time_entry(self, issue_id, hours, **kwargs):
+        _, data = await self.request(
+            "POST",
+            f"{self.url}/time_entries.json",
+            json=self.time_entry_payload(issue_id, hours, **kwargs),
+        )
+
+        return data
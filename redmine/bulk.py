@@ -0,0 +1,96 @@
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+
+from requests.exceptions import ConnectionError, HTTPError, Timeout
+
+# Answers that mean "try again later" rather than "this request is wrong"
+TRANSIENT_STATUSES = {429, 500, 502, 503, 504}
+
+# Upper bound in seconds for a server's Retry-After
+MAX_RETRY_DELAY = 60
+
+
+def is_transient(error, statuses=TRANSIENT_STATUSES):
+    if isinstance(error, (ConnectionError, Timeout)):
+        return True
+    if isinstance(error, HTTPError) and error.response is not None:
+        return error.response.status_code in statuses
+
+    return False
+
+
+def is_throttled(error):
+    # Only answers that guarantee the server did not process the request, the
+    # ones safe to retry for requests that aren't idempotent (i.e creating
+    # an issue or adding a note).
+    return isinstance(error, HTTPError) and is_transient(error, {429, 503})
+
+
+def retry_delay(error, attempt, backoff):
+    response = getattr(error, "response", None)
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            return min(int(retry_after), MAX_RETRY_DELAY)
+
+    return backoff * 2 ** attempt
+
+
+def call(func, item, retries=2, backoff=0.5, transient=is_transient):
+    """ Call func(item), retrying transient errors with exponential backoff """
+    attempt = 0
+    while True:
+        try:
+            return func(item)
+        except Exception as e:
+            if attempt >= retries or not transient(e):
+                raise
+            time.sleep(retry_delay(e, attempt, backoff))
+            attempt += 1
+
+
+def run(func, items, workers=1, retries=2, backoff=0.5, transient=is_transient):
+    """
+    Call func for every item on a pool of workers and yield (item, result,
+    error) as calls complete. Only a few items per worker are taken from the
+    iterable at a time, so it can be a stream of any length.
+    """
+    items = iter(items)
+    workers = max(workers, 1)
+
+    def submit(executor, item):
+        future = executor.submit(call, func, item, retries, backoff, transient)
+        pending[future] = item
+
+    pending = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for item in islice(items, workers * 2):
+            submit(executor, item)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                item = pending.pop(future)
+                for next_item in islice(items, 1):
+                    submit(executor, next_item)
+
+                try:
+                    yield item, future.result(), None
+                except Exception as e:
+                    yield item, None, e
+
+
+def error_messages(error):
+    """ Messages Redmine sent back with a failed request, or the error itself """
+    response = getattr(error, "response", None)
+    if response is not None:
+        try:
+            content = json.loads(response.content)
+        except (ValueError, TypeError, AttributeError):
+            content = {}
+        if isinstance(content, dict) and content.get("errors"):
+            return content["errors"]
+
+    return [str(error)]
@@ -0,0 +1,75 @@
+import hashlib
+import os
+import time
+from urllib.parse import urlencode, urlparse
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+DAY = 24 * HOUR
+
+# How long a cached resource is served without asking the server again. Keys
+# are resource paths or, for nested resources (i.e projects/12/versions), the
+# last path component.
+TTL = {
+    "issue_statuses": 7 * DAY,
+    "trackers": 7 * DAY,
+    "enumerations/issue_priorities": 7 * DAY,
+    "enumerations/time_entry_activities": 7 * DAY,
+    "custom_fields": DAY,
+    "users": DAY,
+    "projects": 6 * HOUR,
+    "versions": HOUR,
+    "queries": 10 * MINUTE,
+}
+DEFAULT_TTL = HOUR
+
+# Once past its TTL an entry is still served, while a fresh copy is fetched in
+# the background, until it is STALE_FACTOR TTLs old. After that it's evicted
+# and fetched before returning.
+STALE_FACTOR = 4
+
+FRESH = "fresh"
+STALE = "stale"
+EXPIRED = "expired"
+
+
+def namespace(url, api_key):
+    """ Directory name for one account: its host plus a digest of URL and key """
+    digest = hashlib.sha1(f"{url}\n{api_key}".encode()).hexdigest()[:10]
+    host = urlparse(url).netloc or "redmine"
+
+    return f"{host.replace(':', '_')}-{digest}"
+
+
+def key(resource, **params):
+    """ Relative cache file path for resource fetched with params """
+    params = sorted((k, str(v)) for k, v in params.items() if v is not None)
+    if not params:
+        return f"{resource}.json"
+
+    digest = hashlib.sha1(urlencode(params).encode()).hexdigest()[:10]
+    return f"{resource}-{digest}.json"
+
+
+def ttl(resource):
+    if resource in TTL:
+        return TTL[resource]
+
+    return TTL.get(resource.split("/")[-1], DEFAULT_TTL)
+
+
+def state(cache_file, resource, now=None):
+    """ Return FRESH, STALE or EXPIRED for cache_file, None if it's missing """
+    if not os.path.exists(cache_file):
+        return None
+
+    now = time.time() if now is None else now
+    age = now - os.path.getmtime(cache_file)
+    max_age = ttl(resource)
+
+    if age <= max_age:
+        return FRESH
+    if age <= max_age * STALE_FACTOR:
+        return STALE
+
+    return EXPIRED
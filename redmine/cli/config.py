@@ -15,6 +15,7 @@ class Config:
         self.url = None
         self.api_key = None
         self.ssl_verify = True
+        self.pool_size = 10
         self.aliases = {}
         self.account = account
 
@@ -40,7 +41,8 @@ class Config:
 
         self.url = config[self.account]["url"]
         self.api_key = config[self.account]["key"]
-        self.ssl_verify = config[self.account].getboolean("ssl_verify")
+        self.ssl_verify = config[self.account].getboolean("ssl_verify", fallback=True)
+        self.pool_size = config[self.account].getint("pool_size", fallback=10)
 
         try:
             self.aliases.update(config.items("aliases"))
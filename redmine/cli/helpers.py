@@ -1,3 +1,5 @@
+import sys
+
 import click
 
 
@@ -13,3 +15,15 @@ def get_note():
     message = click.edit("\n\n" + MARKER)
     if message is not None:
         return message.split(MARKER, 1)[0].rstrip("\n")
+
+
+def open_store(redmine):
+    """ The local issue store, exiting if nothing was ever synced into it """
+    from redmine.store import IssueStore
+
+    store = IssueStore.from_redmine(redmine)
+    if not store.projects():
+        click.echo(click.style("Fatal: run `redmine sync` first", fg="red"))
+        sys.exit(1)
+
+    return store
@@ -1,23 +1,23 @@
 import datetime
 import json
+import os
 import sys
 from collections import OrderedDict
 
 import click
-from requests.exceptions import HTTPError
 
 from redmine.activity import Activity
-from redmine.custom_field import CustomField
 from redmine.cli.alias import AliasedGroup
 from redmine.cli.config import Config, pass_config
-from redmine.cli.helpers import get_description, get_note
+from redmine.cli.helpers import get_description, get_note, open_store
 from redmine.cli.options import OPTIONS
+from redmine.custom_field import CustomField
 from redmine.issue import Issue, IssueStatus
 from redmine.priority import Priority
 from redmine.project import Project
 from redmine.query import Query
-from redmine.redmine import Redmine
-from redmine.time import Time
+from redmine.table import ISSUES, TIMES, Table, terminal_width
+from redmine.time import Time, TimeReport
 from redmine.tracker import Tracker
 from redmine.user import User
 from redmine.version import Version
@@ -34,6 +34,12 @@ CONTEXT_SETTINGS = {"help_option_names": ["-h", "--help"]}
 )
 @click.option(OPTIONS["account"]["long"], help=OPTIONS["account"]["help"])
 @click.option(OPTIONS["verbose"]["long"], help=OPTIONS["verbose"]["help"])
+@click.option(
+    OPTIONS["workers"]["long"],
+    help=OPTIONS["workers"]["help"],
+    show_default=True,
+    default=4,
+)
 @click.pass_context
 def cli(ctx, **kwargs):
     try:
@@ -42,12 +48,16 @@ def cli(ctx, **kwargs):
         click.echo(click.style(f"Fatal: {e}", fg="red"))
         sys.exit(1)
 
+    from redmine.redmine import Redmine
+
     redmine = Redmine(
         cfg.url,
         cfg.api_key,
         cfg.ssl_verify,
         invalidate_cache=kwargs.get("force"),
         verbose=kwargs.get("verbose"),
+        pool_size=cfg.pool_size,
+        workers=kwargs.get("workers"),
     )
     ctx.obj = redmine
 
@@ -74,28 +84,58 @@ def cli(ctx, **kwargs):
 @click.option(OPTIONS["created-after"]["long"], default=None)
 @click.option(OPTIONS["created-before"]["long"], default=None)
 @click.option(OPTIONS["json"]["long"], default=False, show_default=True)
+@click.option(OPTIONS["ndjson"]["long"], help=OPTIONS["ndjson"]["help"], is_flag=True)
+@click.option(
+    OPTIONS["offline"]["long"],
+    OPTIONS["offline"]["alias"],
+    help=OPTIONS["offline"]["help"],
+    is_flag=True,
+    default=False,
+)
 @click.pass_obj
 @click.pass_context
 def issues(ctx, redmine, issue_ids, **kwargs):
     """ List issues """
 
+    from requests.exceptions import HTTPError
+
     if ctx.parent.alias:
         kwargs.update(ctx.parent.params)
 
     if issue_ids:
         kwargs.update({"issue_id": ",".join(issue_ids)})
 
+    if kwargs.get("offline"):
+        store = open_store(redmine)
+        try:
+            rows = store.query(**kwargs)
+        except ValueError as e:
+            return click.echo(click.style(f"Fatal: {e}", fg="red"))
+
+        if kwargs.get("json"):
+            return click.echo(json.dumps([json.loads(row["data"]) for row in rows]))
+
+        if kwargs.get("ndjson"):
+            for row in rows:
+                click.echo(row["data"])
+        else:
+            table = Table(ISSUES, width=terminal_width())
+            table.write(json.loads(row["data"]) for row in rows)
+        return
+
     try:
-        issues = redmine.get_issues(**kwargs)
+        if kwargs.get("json"):
+            return click.echo(json.dumps(redmine.get_issues(**kwargs)))
+
+        issues = redmine.iter_issues(**kwargs)
+        if kwargs.get("ndjson"):
+            for issue in issues:
+                click.echo(json.dumps(issue))
+        else:
+            Table(ISSUES, width=terminal_width()).write(issues)
     except HTTPError as e:
         return click.echo(click.style(f"Fatal: {e}", fg="red"))
 
-    if kwargs.get("json"):
-        return click.echo(json.dumps(issues))
-
-    for issue in issues:
-        click.echo(Issue(**issue).as_row())
-
 
 @cli.command()
 @click.argument("issue_id")
@@ -105,28 +145,32 @@ def issues(ctx, redmine, issue_ids, **kwargs):
 def show(redmine, issue_id, journals, pager):
     """ Show issue details """
 
+    from requests.exceptions import HTTPError
+
     try:
         issue = redmine.get_issue(issue_id, journals)
     except HTTPError as e:
         return click.echo(click.style(f"Fatal: {e}", fg="red"))
 
     try:
-        issue = Issue(
-            **issue,
-            statuses=redmine.statuses,
-            priorities=redmine.priorities,
-            projects=redmine.projects,
-            users=redmine.users,
-        )
-        if pager:
-            click.echo_via_pager(str(issue))
-        else:
-            click.echo(str(issue))
+        # Reference data is only needed to name what journals changed
+        context = redmine.journal_context if issue.get("journals") else None
+        issue = Issue(**issue, context=context)
+        # Before anything is written, so the error doesn't land mid-issue
+        issue.check()
     except KeyError:
         return click.echo(
             click.style(f"Cache is obsolete. Run with --force.", fg="red")
         )
 
+    # Pieces are written as they're rendered, so less opens right away
+    if pager:
+        click.echo_via_pager(issue.render())
+    else:
+        for text in issue.render():
+            click.echo(text, nl=False)
+        click.echo()
+
 
 @cli.command()
 @click.option(
@@ -162,6 +206,8 @@ def show(redmine, issue_id, journals, pager):
 def create(ctx, redmine, *args, **kwargs):
     """ Create new issue """
 
+    from requests.exceptions import HTTPError
+
     if ctx.parent.alias:
         kwargs.update(ctx.parent.params)
 
@@ -207,11 +253,19 @@ def create(ctx, redmine, *args, **kwargs):
 @click.option(OPTIONS["due"]["long"], OPTIONS["due"]["short"], default=None)
 @click.option(OPTIONS["done"]["long"], OPTIONS["done"]["short"], default=None)
 @click.option(OPTIONS["parent"]["long"], OPTIONS["parent"]["short"], default=None)
+@click.option(
+    OPTIONS["retries"]["long"],
+    help=OPTIONS["retries"]["help"],
+    default=2,
+    show_default=True,
+)
 @click.pass_obj
 @click.pass_context
 def update(ctx, redmine, issues, **kwargs):
     """ Update issue """
 
+    from redmine import bulk
+
     if ctx.parent.alias:
         kwargs.update(ctx.parent.params)
 
@@ -224,19 +278,44 @@ def update(ctx, redmine, issues, **kwargs):
     if kwargs.get("due") in ["now", "today"]:
         kwargs["due"] = datetime.date.today().isoformat()
 
-    try:
-        for issue_id in issues:
-            updated = redmine.update_issue(issue_id, **kwargs)
+    # A note is added again by every PUT that reaches the server, so only
+    # retry answers that guarantee it wasn't processed.
+    transient = bulk.is_throttled if kwargs.get("note") else bulk.is_transient
+
+    failed = {}
+    results = bulk.run(
+        lambda issue_id: redmine.update_issue(issue_id, **kwargs),
+        issues,
+        workers=redmine.workers,
+        retries=kwargs.get("retries"),
+        transient=transient,
+    )
 
-            if updated:
-                msg = f"Issue {issue_id} updated."
-                click.echo(click.style(msg, fg="green"), err=True)
-    except HTTPError as e:
+    # Keep going past failed issues and report them all at the end
+    for issue_id, updated, error in results:
+        if error is not None:
+            failed[issue_id] = error
+            msg = f"Issue {issue_id} failed."
+            click.echo(click.style(msg, fg="red"), err=True)
+        elif updated:
+            msg = f"Issue {issue_id} updated."
+            click.echo(click.style(msg, fg="green"), err=True)
+
+    if len(issues) > 1:
+        click.echo(f"\n{len(issues) - len(failed)} updated, {len(failed)} failed\n")
+        for issue_id in issues:
+            if issue_id in failed:
+                messages = "; ".join(bulk.error_messages(failed[issue_id]))
+                click.echo(click.style(f"{issue_id:>6} failed  {messages}", fg="red"))
+            else:
+                click.echo(click.style(f"{issue_id:>6} updated", fg="green"))
+    elif failed:
+        e = failed[issues[0]]
         click.echo(click.style(f"Fatal: {e}", fg="red"))
-        content = json.loads(e.response.content)
-        if "errors" in content:
-            for i, error in enumerate(content["errors"]):
-                click.echo(click.style(f"ERROR {i}: {error}", fg="red"))
+        for i, error in enumerate(bulk.error_messages(e)):
+            click.echo(click.style(f"ERROR {i}: {error}", fg="red"))
+
+    if failed:
         sys.exit(1)
 
 
@@ -251,6 +330,8 @@ def list():
 def projects(redmine):
     """ List projects """
 
+    from requests.exceptions import HTTPError
+
     try:
         projects = sorted(redmine.get("projects"), key=lambda x: x["name"])
     except HTTPError as e:
@@ -265,6 +346,8 @@ def projects(redmine):
 def tracker(redmine):
     """ List trackers """
 
+    from requests.exceptions import HTTPError
+
     try:
         trackers = sorted(redmine.get("trackers"), key=lambda x: x["id"])
     except HTTPError as e:
@@ -279,6 +362,8 @@ def tracker(redmine):
 def status(redmine):
     """ List statuses """
 
+    from requests.exceptions import HTTPError
+
     try:
         statuses = sorted(redmine.get("issue_statuses"), key=lambda x: x["id"])
     except HTTPError as e:
@@ -293,6 +378,8 @@ def status(redmine):
 def query(redmine):
     """ List queries """
 
+    from requests.exceptions import HTTPError
+
     try:
         queries = sorted(redmine.get("queries"), key=lambda x: x["id"])
     except HTTPError as e:
@@ -307,6 +394,8 @@ def query(redmine):
 def priority(redmine):
     """ List priorities """
 
+    from requests.exceptions import HTTPError
+
     try:
         priorities = sorted(
             redmine.get("enumerations/issue_priorities"), key=lambda x: x["id"]
@@ -323,6 +412,8 @@ def priority(redmine):
 def activity(redmine):
     """ List time tracking activities """
 
+    from requests.exceptions import HTTPError
+
     try:
         activities = sorted(
             redmine.get("enumerations/time_entry_activities"), key=lambda x: x["id"]
@@ -335,12 +426,16 @@ def activity(redmine):
 
 
 @list.command()
+@click.option(OPTIONS["sync"]["long"], help=OPTIONS["sync"]["help"], default=False)
 @click.pass_obj
-def user(redmine):
+def user(redmine, sync):
     """ List users """
 
+    from requests.exceptions import HTTPError
+
     try:
-        users = OrderedDict(sorted(redmine.get_users().items(), key=lambda x: x[1]))
+        users = redmine.sync_users() if sync else redmine.get_users()
+        users = OrderedDict(sorted(users.items(), key=lambda x: x[1]))
     except HTTPError as e:
         return click.echo(click.style(f"Fatal: {e}", fg="red"))
 
@@ -351,6 +446,8 @@ def user(redmine):
 @list.command()
 @click.pass_obj
 def custom_fields(redmine):
+    from requests.exceptions import HTTPError
+
     try:
         custom_fields = redmine.get("custom_fields")
     except HTTPError as e:
@@ -381,6 +478,8 @@ def project(context, project_id):
 def roadmap(context):
     """ List versions of a project """
 
+    from requests.exceptions import HTTPError
+
     redmine = context.obj
     project_id = context.obj.project_id
 
@@ -400,14 +499,18 @@ def version():
     """ Print version """
 
     import platform
-    import pkg_resources
+
+    try:
+        from importlib.metadata import version as package_version
+    except ImportError:  # Python < 3.8
+        from importlib_metadata import version as package_version
 
     system = platform.system()
     kernel = platform.release()
     python_version = platform.python_version()
 
     pkg_name = "redminecli"
-    version = pkg_resources.require(pkg_name)[0].version
+    version = package_version(pkg_name)
 
     msg = f"{pkg_name} {version} Python {python_version} {system} {kernel}"
 
@@ -432,18 +535,32 @@ def open(redmine, issue_id):
 @click.option(OPTIONS["from"]["long"], default=None)
 @click.option(OPTIONS["to"]["long"], default=None)
 @click.option(OPTIONS["on"]["long"], default=None)
+@click.option(OPTIONS["group-by"]["long"], help=OPTIONS["group-by"]["help"])
+@click.option(OPTIONS["sum"]["long"], help=OPTIONS["sum"]["help"], is_flag=True)
+@click.option(OPTIONS["ndjson"]["long"], help=OPTIONS["ndjson"]["help"], is_flag=True)
 @click.pass_obj
 def times(redmine, **kwargs):
     """ List spent times """
 
+    from requests.exceptions import HTTPError
+
     on = kwargs.get("on")
     if on is not None:
         kwargs.update({"from": on, "to": on})
 
+    report = None
+    if kwargs.get("group_by") or kwargs.get("sum"):
+        groups = [g.strip() for g in (kwargs.get("group_by") or "").split(",")]
+        try:
+            report = TimeReport([g for g in groups if g])
+        except ValueError as e:
+            return click.echo(click.style(f"Fatal: {e}", fg="red"))
+
     try:
-        entries = redmine.get(
+        entries = redmine.iter_resource(
             "time_entries",
-            cache=False,
+            # Totals don't depend on the order pages arrive in
+            ordered=report is None,
             **{
                 "user_id": kwargs.get("user"),
                 "project_id": kwargs.get("project"),
@@ -451,11 +568,34 @@ def times(redmine, **kwargs):
                 "to": kwargs.get("to"),
             },
         )
+
+        if report is not None:
+            for entry in entries:
+                report.add(entry)
+        elif kwargs.get("ndjson"):
+            for entry in entries:
+                click.echo(json.dumps(entry))
+        else:
+            Table(TIMES, width=terminal_width()).write(entries)
     except HTTPError as e:
         return click.echo(click.style(f"Fatal: {e}", fg="red"))
 
-    for entry in entries:
-        click.echo(Time(**entry))
+    if report is None:
+        return
+
+    if report.group_by:
+        for columns, hours in report.rows():
+            if kwargs.get("ndjson"):
+                click.echo(json.dumps({**columns, "hours": hours}))
+            else:
+                click.echo(Time.format(hours, **columns))
+
+    if kwargs.get("sum"):
+        total = round(report.total, 2)
+        if kwargs.get("ndjson"):
+            click.echo(json.dumps({"hours": total}))
+        else:
+            click.echo(click.style(Time.format(total, project="Total"), bold=True))
 
 
 @cli.command()
@@ -468,9 +608,200 @@ def times(redmine, **kwargs):
 def spent(redmine, issue_id, hours, **kwargs):
     """ Create new time entry """
 
+    from requests.exceptions import HTTPError
+
     try:
         redmine.create_time_entry(issue_id, hours, **kwargs)
     except HTTPError as e:
         return click.echo(click.style(f"Fatal: {e}", fg="red"))
 
     click.echo(click.style("Time logged", fg="green"), err=True)
+
+
+@cli.command()
+@click.argument("projects", nargs=-1)
+@click.option(
+    OPTIONS["journals"]["long"],
+    OPTIONS["journals"]["short"],
+    default=None,
+    help="Mirror journals too (remembered per project)",
+)
+@click.pass_obj
+def sync(redmine, projects, journals):
+    """ Mirror issues of projects into the local store """
+
+    from requests.exceptions import HTTPError
+
+    from redmine.store import IssueStore
+
+    store = IssueStore.from_redmine(redmine)
+
+    # Without arguments refresh every project synced before
+    projects = projects or store.projects()
+    if not projects:
+        click.echo(click.style("Fatal: No projects to sync", fg="red"))
+        sys.exit(1)
+
+    try:
+        store.sync_meta(redmine)
+    except HTTPError as e:
+        click.echo(click.style(f"Fatal: {e}", fg="red"))
+        sys.exit(1)
+
+    for project in projects:
+        try:
+            count = store.sync(redmine, project, journals)
+        except HTTPError as e:
+            click.echo(click.style(f"Fatal: {e}", fg="red"))
+            sys.exit(1)
+
+        msg = f"{project}: {count} issues synced"
+        click.echo(click.style(msg, fg="green"), err=True)
+
+
+@cli.command()
+@click.argument("text", nargs=-1, required=True)
+@click.option(OPTIONS["limit"]["long"], OPTIONS["limit"]["short"], default=25)
+@click.option(OPTIONS["json"]["long"], default=False, show_default=True)
+@click.pass_obj
+def search(redmine, text, **kwargs):
+    """ Search issues in the local store """
+
+    store = open_store(redmine)
+    try:
+        rows = store.search(" ".join(text), kwargs.get("limit"))
+    except ValueError as e:
+        return click.echo(click.style(f"Fatal: {e}", fg="red"))
+
+    if kwargs.get("json"):
+        return click.echo(json.dumps([json.loads(row["data"]) for row in rows]))
+
+    Table(ISSUES, width=terminal_width()).write(json.loads(row["data"]) for row in rows)
+
+
+@cli.group(name="import")
+def import_():
+    """ Create resources in bulk from files """
+    pass
+
+
+@import_.command(name="issues")
+@click.argument("file", type=click.File("r"))
+@click.option(
+    OPTIONS["format"]["long"],
+    help=OPTIONS["format"]["help"],
+    type=click.Choice(["csv", "jsonl"]),
+    default=None,
+)
+@click.option(OPTIONS["checkpoint"]["long"], help=OPTIONS["checkpoint"]["help"])
+@click.option(OPTIONS["project"]["long"], OPTIONS["project"]["short"], default=None)
+@click.option(OPTIONS["tracker"]["long"], OPTIONS["tracker"]["short"], default=None)
+@click.option(OPTIONS["status"]["long"], OPTIONS["status"]["short"], default=None)
+@click.option(OPTIONS["priority"]["long"], OPTIONS["priority"]["short"], default=None)
+@click.option(
+    OPTIONS["retries"]["long"],
+    help=OPTIONS["retries"]["help"],
+    default=2,
+    show_default=True,
+)
+@click.pass_obj
+def import_issue_file(redmine, file, **kwargs):
+    """ Create issues from a CSV or JSONL file ("-" for stdin) """
+
+    from redmine import bulk
+    from redmine.importer import (Checkpoint, detect_format, import_issues,
+                                  read_rows)
+
+    fmt = kwargs.get("format") or detect_format(file.name)
+    checkpoint_path = kwargs.get("checkpoint") or f"{file.name}.checkpoint"
+    if file.name == "<stdin>" and not kwargs.get("checkpoint"):
+        checkpoint_path = os.devnull
+
+    # Values for columns a row doesn't have
+    defaults = {
+        "project": kwargs.get("project"),
+        "tracker": kwargs.get("tracker"),
+        "status": kwargs.get("status"),
+        "priority": kwargs.get("priority"),
+    }
+
+    created, failed = 0, 0
+    with Checkpoint(checkpoint_path) as checkpoint:
+        results = import_issues(
+            redmine,
+            read_rows(file, fmt),
+            checkpoint,
+            defaults=defaults,
+            retries=kwargs.get("retries"),
+        )
+
+        for number, issue, error in results:
+            if error is None:
+                created += 1
+                click.echo(Issue(**issue).as_row())
+                continue
+
+            failed += 1
+            messages = "; ".join(bulk.error_messages(error))
+            msg = f"Row {number} failed: {messages}"
+            click.echo(click.style(msg, fg="red"), err=True)
+
+    msg = f"{created} issues created, {failed} failed"
+    click.echo(click.style(msg, fg="red" if failed else "green"), err=True)
+
+    if failed:
+        sys.exit(1)
+
+
+@import_.command(name="times")
+@click.argument("file", type=click.File("r"))
+@click.option(
+    OPTIONS["format"]["long"],
+    help=OPTIONS["format"]["help"],
+    type=click.Choice(["csv", "jsonl"]),
+    default=None,
+)
+@click.option(
+    OPTIONS["retries"]["long"],
+    help=OPTIONS["retries"]["help"],
+    default=2,
+    show_default=True,
+)
+@click.pass_obj
+def import_time_file(redmine, file, **kwargs):
+    """ Log time entries from a CSV or JSONL file ("-" for stdin) """
+
+    from requests.exceptions import HTTPError
+
+    from redmine import bulk
+    from redmine.importer import (DuplicateEntry, detect_format,
+                                  import_time_entries, read_rows)
+
+    fmt = kwargs.get("format") or detect_format(file.name)
+
+    created, skipped, failed = 0, 0, 0
+    try:
+        results = import_time_entries(
+            redmine, read_rows(file, fmt), retries=kwargs.get("retries")
+        )
+
+        for number, entry, error in results:
+            if error is None:
+                created += 1
+                click.echo(Time(**entry))
+            elif isinstance(error, DuplicateEntry):
+                skipped += 1
+            else:
+                failed += 1
+                messages = "; ".join(bulk.error_messages(error))
+                msg = f"Row {number} failed: {messages}"
+                click.echo(click.style(msg, fg="red"), err=True)
+    except HTTPError as e:
+        click.echo(click.style(f"Fatal: {e}", fg="red"))
+        sys.exit(1)
+
+    msg = f"{created} time entries logged, {skipped} already logged, {failed} failed"
+    click.echo(click.style(msg, fg="red" if failed else "green"), err=True)
+
+    if failed:
+        sys.exit(1)
@@ -25,6 +25,7 @@ OPTIONS = {
     "edit": {"long": "--edit/--no-edit", "short": "-e/-E"},
     "force": {"long": "--force/--no-force", "help": "Invalidate cache"},
     "json": {"long": "--json/--no-json"},
+    "ndjson": {"long": "--ndjson", "help": "One JSON object per line, as they arrive"},
     "account": {"long": "--account", "help": "Account name to use"},
     "pager": {"long": "--pager/--no-pager"},
     "user": {"long": "--user", "short": "-u"},
@@ -33,6 +34,24 @@ OPTIONS = {
     "on": {"long": "--on"},
     "activity": {"long": "--activity", "short": "-A"},
     "comment": {"long": "--comment", "short": "-C"},
+    "group-by": {
+        "long": "--group-by",
+        "help": "Sum hours per user, project, activity and/or week (comma separated)",
+    },
+    "sum": {"long": "--sum", "help": "Print the total of hours"},
     "verbose": {"long": "--verbose/--no-verbose", "help": "Verbose output"},
-    "custom_field": {"long": "--cf", "help": "Custom field"}
+    "custom_field": {"long": "--cf", "help": "Custom field"},
+    "sync": {"long": "--sync/--no-sync", "help": "Refresh changed users"},
+    "offline": {
+        "long": "--offline",
+        "alias": "--local",
+        "help": "Query the local issue store (see sync)",
+    },
+    "format": {"long": "--format", "help": "Input format, by extension if not set"},
+    "checkpoint": {
+        "long": "--checkpoint",
+        "help": "Record of imported rows, FILE.checkpoint by default",
+    },
+    "retries": {"long": "--retries", "help": "Retries for transient errors"},
+    "workers": {"long": "--workers", "help": "Number of concurrent requests"},
 }
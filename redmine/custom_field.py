@@ -1,4 +1,6 @@
 class CustomField:
+    __slots__ = ("id", "name", "is_required", "multiple", "default", "possible_values")
+
     def __init__(self, **kwargs):
         self.id = kwargs.get("id")
         self.name = kwargs.get("name")
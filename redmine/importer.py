@@ -0,0 +1,298 @@
+import csv
+import json
+import os
+import re
+from datetime import date
+from itertools import islice
+
+from redmine import bulk
+
+# Columns accepted for create_issue's arguments, by their CLI and API names
+ISSUE_COLUMNS = {
+    "subject": "subject",
+    "description": "description",
+    "project": "project",
+    "project_id": "project",
+    "tracker": "tracker",
+    "tracker_id": "tracker",
+    "status": "status",
+    "status_id": "status",
+    "priority": "priority",
+    "priority_id": "priority",
+    "assignee": "assignee",
+    "assigned_to_id": "assignee",
+    "parent": "parent",
+    "parent_issue_id": "parent",
+    "start": "start",
+    "start_date": "start",
+    "due": "due",
+    "due_date": "due",
+    "done": "done",
+    "done_ratio": "done",
+}
+
+# Prefix of columns holding custom field values, i.e "cf:12" for field 12
+CUSTOM_FIELD_PREFIX = "cf:"
+
+
+def read_rows(fp, fmt):
+    """ Yield (row number, dict) for every record of a CSV or JSONL stream """
+    if fmt == "csv":
+        for number, row in enumerate(csv.DictReader(fp), start=1):
+            yield number, row
+    else:
+        number = 0
+        for line in fp:
+            if not line.strip():
+                continue
+            number += 1
+            yield number, json.loads(line)
+
+
+def detect_format(filename):
+    if os.path.splitext(filename)[1].lower() in (".jsonl", ".ndjson"):
+        return "jsonl"
+
+    return "csv"
+
+
+def issue_fields(row, defaults=None):
+    """ Map a row to create_issue keyword arguments """
+    fields = {k: v for k, v in (defaults or {}).items() if v is not None}
+    custom_fields = []
+
+    for column, value in row.items():
+        if value is None or value == "":
+            continue
+
+        if column in ISSUE_COLUMNS:
+            fields[ISSUE_COLUMNS[column]] = value
+        elif column.startswith(CUSTOM_FIELD_PREFIX):
+            custom_fields.append((column.partition(":")[2], value))
+        elif column == "custom_fields":
+            custom_fields.extend((cf["id"], cf["value"]) for cf in value)
+        elif column == "cf" and isinstance(value, dict):
+            custom_fields.extend(value.items())
+
+    fields["cf"] = custom_fields
+
+    return fields
+
+
+class Checkpoint:
+    """ Append-only record of imported rows, so a rerun skips them """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+
+        if os.path.exists(path):
+            with open(path, "r") as cp:
+                for line in cp:
+                    number, _, _ = line.partition("\t")
+                    if number.strip().isdigit():
+                        self.done.add(int(number))
+
+    def __contains__(self, number):
+        return number in self.done
+
+    def __enter__(self):
+        self.fp = open(self.path, "a")
+        return self
+
+    def __exit__(self, *args):
+        self.fp.close()
+
+    def add(self, number, resource_id):
+        self.done.add(number)
+        self.fp.write(f"{number}\t{resource_id}\n")
+        self.fp.flush()
+
+
+def import_issues(redmine, rows, checkpoint, defaults=None, retries=2):
+    """
+    Create an issue for every row not in checkpoint and yield (row number,
+    issue, error) as each completes.
+    """
+    pending = ((n, row) for n, row in rows if n not in checkpoint)
+
+    def create(item):
+        number, row = item
+        return redmine.create_issue(**issue_fields(row, defaults))
+
+    results = bulk.run(
+        create,
+        pending,
+        workers=redmine.workers,
+        retries=retries,
+        transient=bulk.is_throttled,
+    )
+
+    for (number, _), issue, error in results:
+        if error is None:
+            checkpoint.add(number, issue["id"])
+        yield number, issue, error
+
+
+# Columns accepted for create_time_entry's arguments
+TIME_ENTRY_COLUMNS = {
+    "issue": "issue_id",
+    "issue_id": "issue_id",
+    "hours": "hours",
+    "on": "on",
+    "spent_on": "on",
+    "activity": "activity",
+    "activity_id": "activity",
+    "comment": "comment",
+    "comments": "comment",
+    "user": "user",
+    "user_id": "user",
+}
+
+
+# Hours as Redmine parses them: decimals (1.5, 1,5, 2h), clock times (1:30)
+# and hours and minutes (1h30, 1h 30m, 90min)
+DECIMAL_HOURS = re.compile(r"^(\d+(?:[.,]\d+)?)h?$")
+CLOCK_HOURS = re.compile(r"^(\d+):(\d+)$")
+UNIT_HOURS = re.compile(r"^(?:(\d+)\s*(?:h|hours?))?\s*(?:(\d+)\s*(?:m|min)?)?$", re.I)
+
+
+class DuplicateEntry(Exception):
+    """ The same time entry is already logged """
+
+
+def time_entry_fields(row):
+    """ Map a row to create_time_entry keyword arguments """
+    fields = {}
+    for column, value in row.items():
+        if column in TIME_ENTRY_COLUMNS and value not in (None, ""):
+            fields[TIME_ENTRY_COLUMNS[column]] = value
+
+    fields.setdefault("on", date.today().isoformat())
+
+    return fields
+
+
+def parse_hours(value):
+    """ Hours in any format Redmine accepts as a float, ValueError otherwise """
+    text = str(value).strip()
+
+    match = DECIMAL_HOURS.match(text)
+    if match:
+        return float(match.group(1).replace(",", "."))
+
+    match = CLOCK_HOURS.match(text)
+    if match:
+        return int(match.group(1)) + int(match.group(2)) / 60
+
+    match = UNIT_HOURS.match(text)
+    if match and (match.group(1) or match.group(2)):
+        return int(match.group(1) or 0) + int(match.group(2) or 0) / 60
+
+    raise ValueError(f"{value} is not a number of hours")
+
+
+def time_entry_key(issue_id, spent_on, user_id, hours, comments):
+    # Hours and comments are part of the key so two different entries on the
+    # same issue and day aren't taken for each other.
+    return (
+        str(issue_id),
+        str(spent_on),
+        str(user_id),
+        round(float(hours), 2),
+        comments or "",
+    )
+
+
+def logged_time_entries(redmine, user_id, spent_from, spent_to):
+    """ Keys of the time entries user_id logged between two dates """
+    entries = redmine.iter_resource(
+        "time_entries", user_id=user_id, **{"from": spent_from, "to": spent_to}
+    )
+
+    return {
+        time_entry_key(
+            (e.get("issue") or {}).get("id"),
+            e["spent_on"],
+            e["user"]["id"],
+            e["hours"],
+            e.get("comments"),
+        )
+        for e in entries
+    }
+
+
+def import_time_entries(redmine, rows, retries=2, chunk_size=500):
+    """
+    Log a time entry for every row and yield (row number, entry, error) as
+    each completes. Rows naming an unknown activity fail without a request and
+    rows already logged fail with DuplicateEntry, so importing a file twice
+    logs everything once.
+    """
+    activities = {
+        str(a["id"]) for a in redmine.get("enumerations/time_entry_activities")
+    }
+    current_user = None
+
+    def create(item):
+        number, fields = item
+        return redmine.create_time_entry(**fields)["time_entry"]
+
+    rows = iter(rows)
+    while True:
+        chunk = [(n, time_entry_fields(row)) for n, row in islice(rows, chunk_size)]
+        if not chunk:
+            break
+
+        # One lookup of entries logged already per user and chunk of rows
+        if current_user is None and any("user" not in f for _, f in chunk):
+            current_user = redmine.fetch("users/current")["user"]["id"]
+        users = {f.get("user", current_user) for _, f in chunk}
+        spent_from = min(f["on"] for _, f in chunk)
+        spent_to = max(f["on"] for _, f in chunk)
+        logged = set()
+        for user_id in users:
+            logged |= logged_time_entries(redmine, user_id, spent_from, spent_to)
+
+        pending = []
+        for number, fields in chunk:
+            activity = fields.get("activity")
+
+            if "issue_id" not in fields or "hours" not in fields:
+                yield number, None, ValueError("Issue and hours are required")
+                continue
+            if activity is not None and str(activity) not in activities:
+                error = ValueError(f"{activity} is not a time entry activity")
+                yield number, None, error
+                continue
+
+            try:
+                fields["hours"] = parse_hours(fields["hours"])
+            except ValueError as e:
+                yield number, None, e
+                continue
+
+            key = time_entry_key(
+                fields["issue_id"],
+                fields["on"],
+                fields.get("user", current_user),
+                fields["hours"],
+                fields.get("comment"),
+            )
+            if key in logged:
+                yield number, None, DuplicateEntry("Already logged")
+            else:
+                # Also catches the same entry twice in one file
+                logged.add(key)
+                pending.append((number, fields))
+
+        results = bulk.run(
+            create,
+            pending,
+            workers=redmine.workers,
+            retries=retries,
+            transient=bulk.is_throttled,
+        )
+
+        for (number, _), entry, error in results:
+            yield number, entry, error
@@ -1,11 +1,37 @@
+import json
 from collections import defaultdict
 from datetime import datetime
 from textwrap import wrap
 
-from redmine.journal import Journal
+from redmine.journal import (Journal, JournalContext, iter_journals,
+                             render_journals)
+
+# Shared stand-in for a missing assignee, so unassigned issues don't each
+# carry their own empty dict.
+UNASSIGNED = defaultdict(str)
 
 
 class Issue:
+    # No per-instance __dict__: exports with 100k issues keep only these
+    __slots__ = (
+        "id",
+        "subject",
+        "tracker",
+        "project",
+        "status",
+        "priority",
+        "author",
+        "assigned_to",
+        "done",
+        "start_date",
+        "due_date",
+        "created_on",
+        "description",
+        "journals",
+        "done_ratio",
+        "context",
+    )
+
     def __init__(self, *args, **kwargs):
         self.id = kwargs.get("id")
         self.subject = kwargs.get("subject")
@@ -14,7 +40,7 @@ class Issue:
         self.status = kwargs.get("status")
         self.priority = kwargs.get("priority")
         self.author = kwargs.get("author")
-        self.assigned_to = kwargs.get("assigned_to", defaultdict(str))
+        self.assigned_to = kwargs.get("assigned_to", UNASSIGNED)
         self.done = kwargs.get("done")
         self.start_date = kwargs.get("start_date")
         self.due_date = kwargs.get("due_date")
@@ -22,20 +48,39 @@ class Issue:
         self.description = kwargs.get("description", "")
         self.journals = kwargs.get("journals")
         self.done_ratio = kwargs.get("done_ratio")
-        self.statuses = kwargs.get("statuses")
-        self.priorities = kwargs.get("priorities")
-        self.users = kwargs.get("users")
+
+        # Lookups for journals are shared (see Redmine.journal_context), the
+        # tables they're built from aren't kept on the issue.
+        self.context = kwargs.get("context")
+        if self.context is None and self.journals:
+            self.context = JournalContext(
+                kwargs.get("statuses"), kwargs.get("priorities"), kwargs.get("users")
+            )
 
     def __repr__(self):
         return f"Issue({self.id}, {self.subject})"
 
+    @classmethod
+    def from_row(cls, row, journals=None, **kwargs):
+        """ Build an issue from an IssueStore row and its journal rows """
+        issue = json.loads(row["data"])
+        if journals:
+            issue["journals"] = [json.loads(j["data"]) for j in journals]
+
+        return cls(**issue, **kwargs)
+
     def __str__(self):
-        issue = self.get_header()
+        return "".join(self.render())
 
-        if self.journals:
-            issue += self.get_journals()
+    def render(self):
+        """
+        Yield the header and then one journal at a time, so a pager can show
+        the start of a long issue before the rest is formatted.
+        """
+        yield self.get_header()
 
-        return issue
+        if self.journals:
+            yield from iter_journals(self.journals, self.context)
 
     def get_header(self):
         header = f"Issue #{self.id} - {self.subject}\n\n"
@@ -62,25 +107,20 @@ class Issue:
 
         if self.description is not None:
             description = wrap(self.description, width=79)
-            header += "\n"
-            for d in description:
-                header += f"{d}\n"
+            header += "\n" + "".join(f"{d}\n" for d in description)
 
         return header
 
     def get_journals(self):
-        journals = ""
-        for journal in self.journals:
-            journals += str(
-                Journal(
-                    **journal,
-                    statuses=self.statuses,
-                    priorities=self.priorities,
-                    users=self.users,
-                )
-            )
+        return render_journals(self.journals, self.context)
 
-        return journals
+    def check(self):
+        """
+        Raise KeyError if a journal detail can't be named (i.e the cached
+        users or statuses are obsolete), before render has written anything.
+        """
+        for journal in self.journals or []:
+            Journal(**journal, context=self.context).check()
 
     def as_row(self, show_assignee=True, show_project=True):
         row = f"{self.id:>6} "
@@ -95,6 +135,8 @@ class Issue:
 
 
 class IssueStatus:
+    __slots__ = ("id", "name")
+
     def __init__(self, *args, **kwargs):
         self.id = kwargs.get("id")
         self.name = kwargs.get("name")
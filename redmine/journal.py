@@ -2,40 +2,70 @@ from datetime import datetime
 from textwrap import wrap
 
 
+class JournalContext:
+    """
+    Names for the ids journal details refer to. Build it once (i.e per Redmine,
+    see Redmine.journal_context) and share it between every journal rendered.
+    """
+
+    PREFIXES = {
+        "assigned_to_id": "Assignee",
+        "status_id": "Status",
+        "start_date": "Start date",
+        "due_date": "Due date",
+        "parent_id": "Parent task",
+        "blocks": "Blocks",
+        "blocked": "Blocked by",
+        "priority_id": "Priority",
+        "tracker_id": "Tracker",
+        "fixed_version_id": "Version",
+        "done_ratio": "Done",
+        "project_id": "Project",
+        "description": "Description",
+        "subject": "Subject",
+        "relates": "Relates",
+    }
+
+    def __init__(self, statuses=None, priorities=None, users=None):
+        self.statuses = {str(s["id"]): s["name"] for s in statuses or []}
+        self.priorities = {str(p["id"]): p["name"] for p in priorities or []}
+        self.users = users or {}
+
+        # Detail prefix to the names its values are looked up in
+        self.names = {
+            "Status": self.statuses,
+            "Priority": self.priorities,
+            "Assignee": self.users,
+        }
+
+
 class Journal:
+    __slots__ = ("user", "created_on", "notes", "details", "context")
+
     def __init__(self, *args, **kwargs):
         self.user = kwargs.get("user")
         self.created_on = kwargs.get("created_on")
         self.notes = kwargs.get("notes")
         self.details = kwargs.get("details")
-        self.prefixes = {
-            "assigned_to_id": "Assignee",
-            "status_id": "Status",
-            "start_date": "Start date",
-            "due_date": "Due date",
-            "parent_id": "Parent task",
-            "blocks": "Blocks",
-            "blocked": "Blocked by",
-            "priority_id": "Priority",
-            "tracker_id": "Tracker",
-            "fixed_version_id": "Version",
-            "done_ratio": "Done",
-            "project_id": "Project",
-            "description": "Description",
-            "subject": "Subject",
-            "relates": "Relates",
-        }
-        self.statuses = {str(s["id"]): s["name"] for s in kwargs.get("statuses", {})}
-        self.priorities = {
-            str(p["id"]): p["name"] for p in kwargs.get("priorities", {})
-        }
-        self.users = kwargs.get("users")
+
+        context = kwargs.get("context")
+        if context is None:
+            context = JournalContext(
+                kwargs.get("statuses"), kwargs.get("priorities"), kwargs.get("users")
+            )
+        self.context = context
 
     def __repr__(self):
         return f"Journal({self.user['name']}, {self.created_on})"
 
     def __str__(self):
-        return self.get_header() + self.get_notes() + self.get_details()
+        return "".join(self.render())
+
+    def render(self):
+        """ Yield the journal's text piece by piece """
+        yield self.get_header()
+        yield from self.iter_notes()
+        yield from self.iter_details()
 
     def get_header(self):
         created_on = datetime.strptime(self.created_on, "%Y-%m-%dT%H:%M:%SZ")
@@ -44,23 +74,30 @@ class Journal:
         return f"\n• {created_on} {self.user['name']}\n\n"
 
     def get_notes(self):
-        notes = ""
+        return "".join(self.iter_notes())
 
+    def iter_notes(self):
         if not self.notes:
-            return notes
+            return
 
         for note in self.notes.splitlines():
             for n in wrap(note, width=79):
-                notes += f"\t{n}\n"
-
-        return notes
+                yield f"\t{n}\n"
 
     def get_details(self):
-        update_detail = ""
+        return "".join(self.iter_details())
+
+    def check(self):
+        """ Raise the KeyError rendering details would, without rendering """
+        for _ in self.iter_details():
+            pass
+
+    def iter_details(self):
+        prefixes = self.context.PREFIXES
 
         for detail in self.details:
             try:
-                prefix = self.prefixes[detail["name"]]
+                prefix = prefixes[detail["name"]]
             except KeyError as e:
                 if detail["property"] == "attachment":
                     prefix = "Attachment"
@@ -69,25 +106,28 @@ class Journal:
                 else:
                     raise KeyError(e)
 
-            if detail.get("old_value") and detail.get("new_value"):
-                if prefix == "Status" and self.statuses:
-                    detail["old_value"] = self.statuses[detail["old_value"]]
-                    detail["new_value"] = self.statuses[detail["new_value"]]
-                elif prefix == "Priority" and self.priorities:
-                    detail["old_value"] = self.priorities[detail["old_value"]]
-                    detail["new_value"] = self.priorities[detail["new_value"]]
-                elif prefix == "Assignee" and self.users:
-                    detail["old_value"] = self.users[detail["old_value"]]
-                    detail["new_value"] = self.users[detail["new_value"]]
-
-                update_detail += (
-                    f"\t‣ {prefix} changed from "
-                    f"{detail['old_value']} to "
-                    f"{detail['new_value']}\n"
-                )
-            elif detail.get("new_value"):
-                update_detail += f"\t‣ {prefix} set to {detail['new_value']}\n"
+            old_value = detail.get("old_value")
+            new_value = detail.get("new_value")
+
+            if old_value and new_value:
+                names = self.context.names.get(prefix)
+                if names:
+                    old_value = names[old_value]
+                    new_value = names[new_value]
+
+                yield f"\t‣ {prefix} changed from {old_value} to {new_value}\n"
+            elif new_value:
+                yield f"\t‣ {prefix} set to {new_value}\n"
             else:
-                update_detail += f"\t‣ {prefix} deleted" f" {detail['old_value']}\n"
+                yield f"\t‣ {prefix} deleted {old_value}\n"
+
+
+def iter_journals(journals, context):
+    """ Yield the text of one journal at a time, all sharing context """
+    for journal in journals:
+        yield str(Journal(**journal, context=context))
+
 
-        return update_detail
+def render_journals(journals, context):
+    """ Text of every journal, sharing one context instead of one per journal """
+    return "".join(iter_journals(journals, context))
@@ -1,4 +1,6 @@
 class Project:
+    __slots__ = ("id", "identifier", "name", "description")
+
     def __init__(self, *args, **kwargs):
         self.id = kwargs.get("id")
         self.identifier = kwargs.get("identifier")
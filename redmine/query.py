@@ -1,4 +1,6 @@
 class Query:
+    __slots__ = ("id", "name")
+
     def __init__(self, *args, **kwargs):
         self.id = kwargs.get("id")
         self.name = kwargs.get("name")
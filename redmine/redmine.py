@@ -1,9 +1,38 @@
+import atexit
+import io
 import json
 import os
+import shutil
+import threading
+import time
+from concurrent.futures import (FIRST_COMPLETED, ThreadPoolExecutor,
+                                as_completed, wait)
+from datetime import datetime, timezone
+from itertools import islice
 from urllib.parse import urljoin
 
 import click
 import requests
+from requests.adapters import HTTPAdapter
+from requests.exceptions import HTTPError
+
+from redmine import cache as cache_policy
+from redmine.journal import JournalContext
+
+# Maximum number of items Redmine returns in one page
+PAGE_SIZE = 100
+
+# Longest, in seconds, a command waits on exit for background cache refreshes
+REFRESH_EXIT_TIMEOUT = 1
+
+
+class Page(dict):
+    """ Decoded body of a response, along with its cache validators """
+
+    def __init__(self, data, etag=None, last_modified=None):
+        super().__init__(data)
+        self.etag = etag
+        self.last_modified = last_modified
 
 
 class Redmine:
@@ -13,29 +42,61 @@ class Redmine:
         api_key,
         ssl_verify=True,
         invalidate_cache=False,
-        cache_initial=True,
+        cache_initial=False,
         verbose=False,
+        pool_size=10,
+        workers=1,
     ):
         self.url = url
         self.auth_header = {"X-Redmine-API-Key": api_key}
         self.ssl_verify = ssl_verify
         self.verbose = verbose
-
-        self.cache_dir = os.path.join(os.getenv("HOME"), ".cache/redmine")
-        if not os.path.exists(self.cache_dir):
-            os.makedirs(self.cache_dir)
+        self.workers = workers
+
+        # One keep-alive session for every request so TCP/TLS handshakes are
+        # paid once per connection in the pool, not once per call.
+        self.session = requests.Session()
+        self.session.headers.update(self.auth_header)
+        self.session.verify = ssl_verify
+        pool_size = max(pool_size, workers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        # Every account (URL and key) gets its own directory since projects,
+        # users and even statuses differ between servers and users.
+        namespace = cache_policy.namespace(url, api_key)
+        self.cache_dir = os.path.join(os.getenv("HOME"), ".cache/redmine", namespace)
 
         if invalidate_cache:
-            for f in os.listdir(self.cache_dir):
-                f_path = os.path.join(self.cache_dir, f)
-                if os.path.isfile(f_path):
-                    os.unlink(f_path)
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
 
+        # Local data that is not a cache (i.e the issue mirror) lives apart so
+        # --force doesn't throw it away.
+        self.data_dir = os.path.join(
+            os.getenv("HOME"), ".local/share/redmine", namespace
+        )
+
+        self._statuses = None
+        self._priorities = None
+        self._projects = None
+        self._users = None
+        self._journal_context = None
+
+        # Cache file to the thread refreshing it
+        self._refreshing = {}
+        self._refresh_lock = threading.Lock()
+        self._wait_at_exit = False
+
+        # Reference data is loaded on first access. Pass cache_initial=True to
+        # warm it up front (i.e. before forking or going offline).
         if cache_initial:
-            self.statuses = self.get("issue_statuses")
-            self.priorities = self.get("enumerations/issue_priorities")
-            self.projects = self.get("projects")
-            self.users = self.get_users()
+            self.statuses
+            self.priorities
+            self.projects
+            self.users
 
     def __repr__(self):
         return f"Redmine({self.url})"
@@ -43,69 +104,444 @@ class Redmine:
     def __str__(self):
         return repr(self)
 
-    def fetch(self, resource, **kwargs):
-        resp = requests.get(
-            urljoin(self.url, "{}.json".format(resource)),
-            params={"limit": 100, **kwargs},
-            headers=self.auth_header,
-            verify=self.ssl_verify,
+    @property
+    def statuses(self):
+        if self._statuses is None:
+            self._statuses = self.get("issue_statuses")
+        return self._statuses
+
+    @property
+    def priorities(self):
+        if self._priorities is None:
+            self._priorities = self.get("enumerations/issue_priorities")
+        return self._priorities
+
+    @property
+    def projects(self):
+        if self._projects is None:
+            self._projects = self.get("projects")
+        return self._projects
+
+    @property
+    def users(self):
+        if self._users is None:
+            self._users = self.get_users()
+        return self._users
+
+    @property
+    def journal_context(self):
+        """ Lookups for rendering journals, shared by every issue shown """
+        if self._journal_context is None:
+            self._journal_context = JournalContext(
+                self.statuses, self.priorities, self.users
+            )
+        return self._journal_context
+
+    def fetch(self, resource, headers=None, **kwargs):
+        resp = self.session.get(
+            urljoin(self.url.rstrip("/") + "/", "{}.json".format(resource)),
+            params={"limit": PAGE_SIZE, **kwargs},
+            headers=headers,
         )
 
         resp.raise_for_status()
 
-        return resp.json()
+        # Only conditional requests (see revalidate) can be answered with 304
+        if resp.status_code == 304:
+            return None
+
+        return Page(
+            resp.json(),
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+        )
+
+    def iter_resource(
+        self, resource, limit=None, offset=0, workers=None, ordered=True, **kwargs
+    ):
+        """ Yield items of a collection, fetching pages as they're consumed """
+        rname = resource.split("/")[-1]
+        limit = int(limit) if limit is not None else None
+        workers = self.workers if workers is None else workers
+
+        yielded = 0
+        while limit is None or yielded < limit:
+            page_size = PAGE_SIZE
+            if limit is not None:
+                page_size = min(PAGE_SIZE, limit - yielded)
+            page = self.fetch(resource, offset=offset, limit=page_size, **kwargs)
+            items = page.get(rname, [])
+
+            for item in items:
+                yield item
+
+            yielded += len(items)
+            offset += len(items)
+
+            # Non paginated resources (i.e issue_statuses) have no total_count
+            total_count = page.get("total_count", 0)
+            if not items or offset >= total_count:
+                break
+
+            # Remaining offsets are known after the first page, fetch them
+            # concurrently instead of one after another.
+            if workers > 1:
+                end = total_count
+                if limit is not None:
+                    end = min(end, offset + limit - yielded)
+                yield from self._iter_pages(
+                    resource, offset, end, workers, ordered, **kwargs
+                )
+                break
+
+    def _iter_pages(self, resource, start, end, workers, ordered, **kwargs):
+        rname = resource.split("/")[-1]
+
+        def fetch_page(page_offset):
+            page_size = min(PAGE_SIZE, end - page_offset)
+            page = self.fetch(resource, offset=page_offset, limit=page_size, **kwargs)
+            return page.get(rname, [])
+
+        # Keep at most two pages per worker in flight so memory stays bounded
+        # when the consumer is slower than the network.
+        offsets = iter(range(start, end, PAGE_SIZE))
+        executor = ThreadPoolExecutor(max_workers=workers)
+        pending = [executor.submit(fetch_page, o) for o in islice(offsets, workers * 2)]
+
+        try:
+            while pending:
+                if ordered:
+                    done = [pending.pop(0)]
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    pending = [f for f in pending if f not in done]
+
+                for future in done:
+                    items = future.result()
+                    for page_offset in islice(offsets, 1):
+                        pending.append(executor.submit(fetch_page, page_offset))
+
+                    for item in items:
+                        yield item
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    def cache_file(self, resource, **kwargs):
+        return os.path.join(self.cache_dir, cache_policy.key(resource, **kwargs))
 
     def set_cache(self, cache_file, data):
-        with open(cache_file, "w+") as cf:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+
+        # Write to a temporary file first so concurrent readers (and other
+        # processes refreshing the same entry) never see a partial file.
+        tmp_file = "{}.{}.tmp".format(cache_file, threading.get_ident())
+        with open(tmp_file, "w+") as cf:
             cf.write(json.dumps(data))
+        os.replace(tmp_file, cache_file)
+
+    def read_cache(self, cache_file):
+        with open(cache_file, "r") as cf:
+            return json.loads(cf.read())
 
     def get(self, resource, cache=True, **kwargs):
         # Some resources (i.e issue_priorities) have paths that contain "/"
         rname = resource.split("/")[-1]
-        cache_file = os.path.join(self.cache_dir, "{}.json".format(rname))
-        if os.path.exists(cache_file):
-            with open(cache_file, "r") as cf:
-                data = json.loads(cf.read())
+        cache_file = self.cache_file(resource, **kwargs)
+        cache_state = cache_policy.state(cache_file, resource)
+
+        if cache_state in (cache_policy.FRESH, cache_policy.STALE):
+            data = self.read_cache(cache_file)
+            if cache_state == cache_policy.STALE and cache:
+                self.refresh_later(
+                    cache_file,
+                    self.revalidate,
+                    cache_file,
+                    resource,
+                    workers=1,
+                    **kwargs,
+                )
         else:
-            data = self.fetch(resource, **kwargs)
-            if resource in data and cache:
-                self.set_cache(cache_file, data)
+            if cache_state == cache_policy.EXPIRED:
+                self.evict(cache_file)
+            data = self.refresh(cache_file, resource, cache=cache, **kwargs)
 
         return data[rname]
 
-    def get_users(self):
+    def evict(self, cache_file):
+        os.unlink(cache_file)
+        if os.path.exists(self.validators_file(cache_file)):
+            os.unlink(self.validators_file(cache_file))
+
+    def refresh(self, cache_file, resource, cache=True, workers=None, **kwargs):
+        rname = resource.split("/")[-1]
+        workers = self.workers if workers is None else workers
+        data = self.fetch(resource, **kwargs)
+        if rname not in data:
+            return data
+
+        pages = [data]
+        offsets = range(len(data[rname]), data.get("total_count", 0), PAGE_SIZE)
+        if data[rname] and offsets:
+            def fetch_page(offset):
+                return self.fetch(resource, offset=offset, **kwargs)
+
+            if workers > 1:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    pages.extend(executor.map(fetch_page, offsets))
+            else:
+                pages.extend(map(fetch_page, offsets))
+            for page in pages[1:]:
+                data[rname].extend(page.get(rname, []))
+
+        if cache:
+            self.set_cache(cache_file, data)
+            self.set_validators(cache_file, pages, [0, *offsets])
+
+        return data
+
+    def validators_file(self, cache_file):
+        return "{}.validators".format(cache_file)
+
+    def read_validators(self, cache_file):
+        """ Validators stored for cache_file's pages, [] if there are none """
+        validators_file = self.validators_file(cache_file)
+        if not os.path.exists(validators_file):
+            return []
+
+        return self.read_cache(validators_file)
+
+    def set_validators(self, cache_file, pages, offsets):
+        validators = []
+        for offset, page in zip(offsets, pages):
+            if not isinstance(page, Page) or not (page.etag or page.last_modified):
+                validators = None
+                break
+            validators.append(
+                {
+                    "offset": offset,
+                    "etag": page.etag,
+                    "last_modified": page.last_modified,
+                }
+            )
+
+        validators_file = self.validators_file(cache_file)
+        if validators:
+            self.set_cache(validators_file, validators)
+        elif os.path.exists(validators_file):
+            os.unlink(validators_file)
+
+    def revalidate(self, cache_file, resource, workers=None, **kwargs):
+        """ Refresh a cached resource, downloading it only if it changed """
+        validators = self.read_validators(cache_file)
+        if validators and all(
+            self.not_modified(resource, page, **kwargs) for page in validators
+        ):
+            # 304 for every page: the cached copy is fresh for another TTL
+            os.utime(cache_file)
+            return self.read_cache(cache_file)
+
+        return self.refresh(cache_file, resource, workers=workers, **kwargs)
+
+    def not_modified(self, resource, validator, **kwargs):
+        """ Whether the page validator was stored for is still the same """
+        # Page bodies include total_count, so added or removed items change
+        # the first page's validators too.
+        headers = self.conditional_headers(validator)
+        offset = validator["offset"]
+        return self.fetch(resource, headers=headers, offset=offset, **kwargs) is None
+
+    @staticmethod
+    def conditional_headers(validator):
+        headers = {}
+        if validator["etag"]:
+            headers["If-None-Match"] = validator["etag"]
+        if validator["last_modified"]:
+            headers["If-Modified-Since"] = validator["last_modified"]
+
+        return headers
+
+    def refresh_later(self, cache_file, func, *args, **kwargs):
+        """ Run func in the background unless cache_file is already refreshing """
+        with self._refresh_lock:
+            if cache_file in self._refreshing:
+                return
+
+            def target():
+                try:
+                    func(*args, **kwargs)
+                except (requests.RequestException, ValueError, RuntimeError):
+                    # Keep serving the stale copy, also when the body isn't
+                    # JSON or the interpreter shuts down under the thread. The
+                    # next call will try again.
+                    pass
+                finally:
+                    with self._refresh_lock:
+                        self._refreshing.pop(cache_file, None)
+
+            # A daemon so a slow server can't hold a short command up. Cache
+            # entries are replaced atomically, so one cut short at exit leaves
+            # the stale copy in place. Callers fetch serially (workers=1): a
+            # command can be exiting by the time func would start a thread
+            # pool, and concurrent.futures refuses new work then.
+            thread = threading.Thread(target=target, daemon=True)
+            self._refreshing[cache_file] = thread
+
+            if not self._wait_at_exit:
+                atexit.register(self.wait_for_refreshes)
+                self._wait_at_exit = True
+
+        thread.start()
+
+    def wait_for_refreshes(self, timeout=REFRESH_EXIT_TIMEOUT):
+        """ Give background refreshes up to timeout seconds in all to finish """
+        deadline = time.monotonic() + timeout
+        with self._refresh_lock:
+            threads = [t for t in self._refreshing.values() if t.is_alive()]
+
+        for thread in threads:
+            thread.join(max(deadline - time.monotonic(), 0))
+
+    def get_users(self, workers=None):
         cache_file = os.path.join(self.cache_dir, "users.json")
-        if os.path.exists(cache_file):
-            with open(cache_file, "r") as cf:
-                users = json.loads(cf.read())
+        cache_state = cache_policy.state(cache_file, "users")
+
+        if cache_state in (cache_policy.FRESH, cache_policy.STALE):
+            users = self.read_cache(cache_file)
+            if cache_state == cache_policy.STALE:
+                self.refresh_later(cache_file, self.sync_users, 1, progress=False)
         else:
-            memberships = []
+            users = self.sync_users(workers)
+
+        return users
 
-            with click.progressbar(self.projects, label="Caching users") as projects:
+    def sync_users(self, workers=None, progress=True):
+        """ Refresh the cached user directory, fetching only what changed """
+        state_file = os.path.join(self.cache_dir, "users_state.json")
+        state = {"synced_on": None, "admin": None, "projects": {}, "users": {}}
+        if os.path.exists(state_file):
+            with open(state_file, "r") as sf:
+                state.update(json.loads(sf.read()))
+
+        synced_on = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        if state["admin"] is not False:
+            try:
+                state["users"].update(self.admin_users(state["synced_on"], workers))
+                state["admin"] = True
+            except HTTPError as e:
+                if e.response is None or e.response.status_code != 403:
+                    raise
+                state["admin"] = False
+
+        if not state["admin"]:
+            self.sync_project_users(state["projects"], workers, progress)
+            state["users"] = {}
+            for project in state["projects"].values():
+                state["users"].update(project["users"])
+
+        state["synced_on"] = synced_on
+        self.set_cache(state_file, state)
+        self.set_cache(os.path.join(self.cache_dir, "users.json"), state["users"])
+        self._users = state["users"]
+
+        return state["users"]
+
+    def admin_users(self, updated_since=None, workers=None):
+        # Only admins can list users and groups. Redmine answers 403 otherwise.
+        params = {}
+        if updated_since is not None:
+            params["updated_on"] = ">=" + updated_since
+
+        users = {
+            str(u["id"]): f"{u['firstname']} {u['lastname']}"
+            for u in self.iter_resource("users", workers=workers, **params)
+        }
+        groups = self.iter_resource("groups", workers=workers)
+        users.update({str(g["id"]): g["name"] for g in groups})
+
+        return users
+
+    def sync_project_users(self, synced, workers=None, progress=True):
+        """ Update the per project user maps in synced in place """
+        projects = list(self.iter_resource("projects", workers=workers))
+        self._projects = projects
+
+        current = {str(p["id"]) for p in projects}
+        for project_id in list(synced):
+            if project_id not in current:
+                del synced[project_id]
+
+        for project, users in self.crawl_memberships(projects, workers, progress):
+            synced[str(project["id"])] = {"users": users}
+
+    def crawl_users(self, projects=None, workers=None):
+        projects = self.projects if projects is None else projects
+
+        users = {}
+        for _, project_users in self.crawl_memberships(projects, workers):
+            users.update(project_users)
+
+        return users
+
+    def crawl_memberships(self, projects, workers=None, progress=True):
+        """ Yield (project, users) pairs as each project's crawl completes """
+        workers = self.workers if workers is None else workers
+
+        # Adding or removing members doesn't touch the project, so every
+        # project's memberships are revalidated. Unchanged ones cost a 304 per
+        # page instead of a download.
+        def get_memberships(project):
+            resource = "projects/{}/memberships".format(project["id"])
+            cache_file = self.cache_file(resource)
+            data = self.revalidate(cache_file, resource, workers=workers)
+            return project, data["memberships"]
+
+        if not projects:
+            return
+
+        bar = click.progressbar(
+            length=len(projects),
+            label="Caching users",
+            file=None if progress else io.StringIO(),
+        )
+
+        if workers <= 1:
+            with bar:
                 for project in projects:
-                    resource = "projects/{}/memberships".format(project["id"])
-                    response = self.fetch(resource)
-                    if "memberships" in response:
-                        memberships.extend(response["memberships"])
-
-            users = {}
-            membership_types = ["user", "group", "group_anonymous"]
-
-            for m in memberships:
-                for t in membership_types:
-                    try:
-                        users[str(m[t]["id"])] = m[t]["name"]
-                    except KeyError:
-                        continue
-                    else:
-                        break
-
-            with open(cache_file, "w+") as cf:
-                cf.write(json.dumps(users))
+                    project, memberships = get_memberships(project)
+                    yield project, self.membership_names(memberships)
+                    bar.update(1)
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(get_memberships, p) for p in projects]
+
+            with bar:
+                for future in as_completed(futures):
+                    project, memberships = future.result()
+                    yield project, self.membership_names(memberships)
+                    bar.update(1)
+
+    @staticmethod
+    def membership_names(memberships):
+        users = {}
+        membership_types = ["user", "group", "group_anonymous"]
+
+        for m in memberships:
+            for t in membership_types:
+                try:
+                    users[str(m[t]["id"])] = m[t]["name"]
+                except KeyError:
+                    continue
+                else:
+                    break
 
         return users
 
-    def get_issues(self, **kwargs):
+    @staticmethod
+    def issue_query(**kwargs):
         updated_on = None
         if kwargs.get("updated_on"):
             updated_on = kwargs.get("updated_on")
@@ -136,40 +572,40 @@ class Redmine:
             "done_ratio": kwargs.get("done"),
             "updated_on": updated_on,
             "created_on": created_on,
-            "limit": kwargs.get("limit"),
             "sort": kwargs.get("sort"),
         }
 
         if kwargs.get("issue_id"):
             query_params = {"issue_id": kwargs.get("issue_id")}
 
-        resp = requests.get(
-            f"{self.url}/issues.json",
-            params=query_params,
-            headers=self.auth_header,
-            verify=self.ssl_verify,
-        )
+        return query_params
 
-        resp.raise_for_status()
+    def iter_issues(self, **kwargs):
+        """ Yield at most limit issues matching the issues command filters """
+        limit = kwargs.get("limit")
+        if kwargs.get("issue_id"):
+            limit = None
+
+        return self.iter_resource("issues", limit=limit, **self.issue_query(**kwargs))
 
-        return resp.json()["issues"]
+    def get_issues(self, **kwargs):
+        return list(self.iter_issues(**kwargs))
 
     def get_issue(self, issue_id, journals):
         query_params = {}
         if journals:
             query_params["include"] = "journals"
-        resp = requests.get(
+        resp = self.session.get(
             f"{self.url}/issues/{issue_id}.json",
             params=query_params,
-            headers=self.auth_header,
-            verify=self.ssl_verify,
         )
 
         resp.raise_for_status()
 
         return resp.json()["issue"]
 
-    def update_issue(self, issue_id, **kwargs):
+    @staticmethod
+    def update_payload(**kwargs):
         fields = {
             "issue": {
                 "subject": kwargs.get("subject"),
@@ -191,19 +627,21 @@ class Redmine:
             if not fields["issue"][field]:
                 del fields["issue"][field]
 
-        resp = requests.put(
+        return fields
+
+    def update_issue(self, issue_id, **kwargs):
+        resp = self.session.put(
             f"{self.url}/issues/{issue_id}.json",
-            json=fields,
-            headers=self.auth_header,
-            verify=self.ssl_verify,
+            json=self.update_payload(**kwargs),
         )
 
         resp.raise_for_status()
 
         return True
 
-    def create_issue(self, **kwargs):
-        fields = {
+    @staticmethod
+    def create_payload(**kwargs):
+        return {
             "issue": {
                 "subject": kwargs.get("subject"),
                 "project_id": kwargs.get("project"),
@@ -216,14 +654,16 @@ class Redmine:
                 "start_date": kwargs.get("start"),
                 "due_date": kwargs.get("due"),
                 "done_ratio": kwargs.get("done"),
-                "custom_fields": [{"id": cf[0], "value": cf[1]} for cf in kwargs.get("cf")]
+                "custom_fields": [
+                    {"id": cf[0], "value": cf[1]} for cf in kwargs.get("cf") or []
+                ],
             }
         }
-        resp = requests.post(
+
+    def create_issue(self, **kwargs):
+        resp = self.session.post(
             f"{self.url}/issues.json",
-            json=fields,
-            headers=self.auth_header,
-            verify=self.ssl_verify,
+            json=self.create_payload(**kwargs),
         )
         if self.verbose:
             print(f"{resp.request.method} {resp.request.path_url}")
@@ -235,7 +675,8 @@ class Redmine:
 
         return resp.json()["issue"]
 
-    def create_time_entry(self, issue_id, hours, **kwargs):
+    @staticmethod
+    def time_entry_payload(issue_id, hours, **kwargs):
         fields = {
             "time_entry": {
                 "issue_id": issue_id,
@@ -250,11 +691,15 @@ class Redmine:
         if kwargs.get("on"):
             fields["time_entry"].update({"spent_on": kwargs.get("on")})
 
-        resp = requests.post(
+        if kwargs.get("user"):
+            fields["time_entry"].update({"user_id": kwargs.get("user")})
+
+        return fields
+
+    def create_time_entry(self, issue_id, hours, **kwargs):
+        resp = self.session.post(
             f"{self.url}/time_entries.json",
-            json=fields,
-            headers=self.auth_header,
-            verify=self.ssl_verify,
+            json=self.time_entry_payload(issue_id, hours, **kwargs),
         )
 
         resp.raise_for_status()
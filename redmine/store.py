@@ -0,0 +1,516 @@
+import json
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+
+from redmine.redmine import PAGE_SIZE
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS issues (
+    id INTEGER PRIMARY KEY,
+    project_id INTEGER,
+    tracker_id INTEGER,
+    status_id INTEGER,
+    priority_id INTEGER,
+    author_id INTEGER,
+    assigned_to_id INTEGER,
+    fixed_version_id INTEGER,
+    parent_id INTEGER,
+    subject TEXT,
+    description TEXT,
+    start_date TEXT,
+    due_date TEXT,
+    done_ratio INTEGER,
+    created_on TEXT,
+    updated_on TEXT,
+    closed_on TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS issues_project_id ON issues (project_id);
+CREATE INDEX IF NOT EXISTS issues_status_id ON issues (status_id);
+CREATE INDEX IF NOT EXISTS issues_assigned_to_id ON issues (assigned_to_id);
+CREATE INDEX IF NOT EXISTS issues_updated_on ON issues (updated_on);
+
+CREATE TABLE IF NOT EXISTS journals (
+    id INTEGER PRIMARY KEY,
+    issue_id INTEGER NOT NULL,
+    user_id INTEGER,
+    created_on TEXT,
+    notes TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS journals_issue_id ON journals (issue_id);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sync_state (
+    project TEXT PRIMARY KEY,
+    watermark TEXT,
+    journals INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+# Full-text index of subjects, descriptions and journal notes, keyed by issue id.
+# Kept apart from SCHEMA since not every SQLite build has FTS5.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS issues_fts
+USING fts5(subject, description, notes, tokenize = 'unicode61 remove_diacritics 2');
+"""
+
+# Columns filled from the nested {"id": ..., "name": ...} objects of an issue
+REFERENCES = {
+    "project_id": "project",
+    "tracker_id": "tracker",
+    "status_id": "status",
+    "priority_id": "priority",
+    "author_id": "author",
+    "assigned_to_id": "assigned_to",
+    "fixed_version_id": "fixed_version",
+    "parent_id": "parent",
+}
+# Values of --sort and the columns they order by
+SORT_COLUMNS = {
+    "id": "id",
+    "project": "project_id",
+    "tracker": "tracker_id",
+    "status": "status_id",
+    "priority": "priority_id",
+    "author": "author_id",
+    "assigned_to": "assigned_to_id",
+    "fixed_version": "fixed_version_id",
+    "parent": "parent_id",
+    "subject": "subject",
+    "start_date": "start_date",
+    "due_date": "due_date",
+    "done_ratio": "done_ratio",
+    "created_on": "created_on",
+    "updated_on": "updated_on",
+    "closed_on": "closed_on",
+}
+
+FIELDS = [
+    "subject",
+    "description",
+    "start_date",
+    "due_date",
+    "done_ratio",
+    "created_on",
+    "updated_on",
+    "closed_on",
+]
+
+
+class IssueStore:
+    """ Local SQLite mirror of issues (and optionally journals) """
+
+    def __init__(self, path):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+
+        created = not self.db.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'issues_fts'"
+        ).fetchone()
+        try:
+            self.db.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False
+
+        if self.fts and created:
+            # Matches in the subject weigh more than in the description or
+            # notes. Setting it as the default rank lets FTS5 sort without
+            # calling bm25() through SQL for every match. FTS5 stores it with
+            # the index, so it's set once, when the index is created.
+            self.db.execute(
+                "INSERT INTO issues_fts (issues_fts, rank) "
+                "VALUES ('rank', 'bm25(10.0, 2.0, 1.0)')"
+            )
+            self.db.commit()
+
+        # Stores synced before search existed have issues but no index yet
+        if self.fts and self.count("issues") and not self.count("issues_fts"):
+            self.index()
+            self.db.commit()
+
+    def __repr__(self):
+        return f"IssueStore({self.path})"
+
+    @classmethod
+    def from_redmine(cls, redmine):
+        return cls(os.path.join(redmine.data_dir, "issues.db"))
+
+    def close(self):
+        self.db.close()
+
+    def upsert_issues(self, issues):
+        columns = ["id", *REFERENCES, *FIELDS, "data"]
+        rows = []
+        for issue in issues:
+            row = [issue["id"]]
+            row += [(issue.get(ref) or {}).get("id") for ref in REFERENCES.values()]
+            row += [issue.get(field) for field in FIELDS]
+            row.append(json.dumps(issue))
+            rows.append(row)
+
+        self.db.executemany(
+            "INSERT OR REPLACE INTO issues ({}) VALUES ({})".format(
+                ", ".join(columns), ", ".join("?" * len(columns))
+            ),
+            rows,
+        )
+        self.index([row[0] for row in rows])
+
+        return len(rows)
+
+    def count(self, table):
+        return self.db.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+
+    def index(self, issue_ids=None):
+        """ (Re)build the search index for issue_ids, all issues if None """
+        if not self.fts:
+            return
+
+        if issue_ids is None:
+            self.db.execute("DELETE FROM issues_fts")
+            where, params = "", []
+        elif issue_ids:
+            placeholders = ", ".join("?" * len(issue_ids))
+            query = f"DELETE FROM issues_fts WHERE rowid IN ({placeholders})"
+            self.db.execute(query, issue_ids)
+            where, params = f"WHERE id IN ({placeholders})", issue_ids
+        else:
+            return
+
+        self.db.execute(
+            "INSERT INTO issues_fts (rowid, subject, description, notes) "
+            "SELECT id, subject, description, "
+            "(SELECT group_concat(notes, char(10)) FROM journals "
+            f"WHERE journals.issue_id = issues.id) FROM issues {where}",
+            params,
+        )
+
+    def search(self, text, limit=25):
+        """ Return issue rows matching every word of text, best matches first """
+        if not self.fts:
+            raise ValueError("SQLite is built without FTS5, search is unavailable")
+
+        # Quote each word so characters like - or : aren't read as FTS syntax
+        words = ['"{}"'.format(w.replace('"', '""')) for w in text.split()]
+        if not words:
+            return []
+
+        # Rank and limit inside the index before joining the issue rows
+        return self.db.execute(
+            "SELECT issues.* FROM ("
+            "SELECT rowid, rank FROM issues_fts WHERE issues_fts MATCH ? "
+            "ORDER BY rank LIMIT ?"
+            ") AS matches JOIN issues ON issues.id = matches.rowid "
+            "ORDER BY matches.rank",
+            (" ".join(words), int(limit)),
+        ).fetchall()
+
+    def upsert_journals(self, issue_id, journals):
+        self.db.executemany(
+            "INSERT OR REPLACE INTO journals "
+            "(id, issue_id, user_id, created_on, notes, data) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    j["id"],
+                    issue_id,
+                    (j.get("user") or {}).get("id"),
+                    j.get("created_on"),
+                    j.get("notes"),
+                    json.dumps(j),
+                )
+                for j in journals
+            ],
+        )
+
+    def issue(self, issue_id):
+        query = "SELECT * FROM issues WHERE id = ?"
+        return self.db.execute(query, (issue_id,)).fetchone()
+
+    def journals(self, issue_id):
+        return self.db.execute(
+            "SELECT * FROM journals WHERE issue_id = ? ORDER BY created_on, id",
+            (issue_id,),
+        ).fetchall()
+
+    def projects(self):
+        rows = self.db.execute("SELECT project FROM sync_state ORDER BY project")
+        return [row["project"] for row in rows]
+
+    def sync_state(self, project):
+        query = "SELECT * FROM sync_state WHERE project = ?"
+        return self.db.execute(query, (project,)).fetchone()
+
+    def watermark(self, project):
+        row = self.sync_state(project)
+        return row["watermark"] if row else None
+
+    def set_watermark(self, project, watermark, journals=False):
+        self.db.execute(
+            "INSERT OR REPLACE INTO sync_state (project, watermark, journals) "
+            "VALUES (?, ?, ?)",
+            (project, watermark, int(journals)),
+        )
+
+    def get_meta(self, key, default=None):
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row["value"]) if row else default
+
+    def set_meta(self, key, value):
+        self.db.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            (key, json.dumps(value)),
+        )
+
+    def sync_meta(self, redmine):
+        """ Keep what offline queries need to resolve open/closed, me, etc. """
+        self.set_meta("statuses", redmine.statuses)
+        self.set_meta("projects", redmine.projects)
+        self.set_meta("current_user", redmine.fetch("users/current")["user"]["id"])
+        self.db.commit()
+
+    def query(self, **kwargs):
+        """ Return issue rows matching the filters of the issues command """
+        if kwargs.get("query"):
+            raise ValueError("Saved queries can't be run against the local store")
+
+        where = IssueFilter(self)
+        if kwargs.get("issue_id"):
+            where.ids("id", kwargs["issue_id"].split(","))
+        else:
+            where.assignee(kwargs.get("assignee"))
+            where.status(kwargs.get("status"))
+            where.project(kwargs.get("project"))
+            where.ids("tracker_id", split(kwargs.get("tracker")))
+            where.ids("priority_id", split(kwargs.get("priority")))
+            where.ids("fixed_version_id", split(kwargs.get("version")))
+            where.ids("parent_id", split(kwargs.get("parent")))
+            where.compare("start_date", kwargs.get("start"))
+            where.compare("due_date", kwargs.get("due"))
+            where.compare("done_ratio", kwargs.get("done"), int)
+            where.compare("updated_on", date_filter(kwargs, "updated"))
+            where.compare("created_on", date_filter(kwargs, "created"))
+
+        sql = "SELECT * FROM issues"
+        if where.clauses:
+            sql += " WHERE " + " AND ".join(where.clauses)
+        sql += " ORDER BY " + order_by(kwargs.get("sort") or "id:desc")
+        params = list(where.params)
+
+        if kwargs.get("limit") and not kwargs.get("issue_id"):
+            sql += " LIMIT ?"
+            params.append(int(kwargs["limit"]))
+
+        return self.db.execute(sql, params)
+
+    def sync(self, redmine, project, journals=None):
+        """ Fetch issues of project updated since the last sync, return count """
+        state = self.sync_state(project)
+        watermark = state["watermark"] if state else None
+        if journals is None:
+            journals = bool(state["journals"]) if state else False
+
+        # Oldest changes first, so the watermark can move forward page by page
+        # and an interrupted sync resumes where it stopped.
+        params = {"project_id": project, "status_id": "*", "sort": "updated_on:asc"}
+
+        # Each page starts at the last updated_on seen rather than at an
+        # offset: an issue updated mid-sync moves to the end of the list, which
+        # would shift the next page past an issue nobody fetched. Issues that
+        # come back unchanged at the start of a page are skipped.
+        count = 0
+        offset = 0
+        seen = set()
+        while True:
+            if watermark is not None:
+                # Inclusive: issues updated in the same second as the
+                # watermark are fetched again rather than missed.
+                params["updated_on"] = ">=" + watermark
+
+            issues = list(
+                redmine.iter_resource(
+                    "issues", limit=PAGE_SIZE, offset=offset, workers=1, **params
+                )
+            )
+            page = [i for i in issues if (i["id"], i["updated_on"]) not in seen]
+            if page:
+                count += self.sync_page(redmine, project, page, journals)
+                seen.update((i["id"], i["updated_on"]) for i in page)
+
+            if len(issues) < PAGE_SIZE:
+                break
+
+            # A whole page updated in the same second as the watermark can't
+            # move it forward, step over that page instead.
+            if issues[-1]["updated_on"] == watermark:
+                offset += len(issues)
+            else:
+                watermark, offset = issues[-1]["updated_on"], 0
+
+        if not seen and watermark is None:
+            self.set_watermark(project, None, journals)
+            self.db.commit()
+
+        return count
+
+    def sync_page(self, redmine, project, issues, journals):
+        if journals:
+            issues = self.with_journals(redmine, issues)
+            for issue in issues:
+                self.upsert_journals(issue["id"], issue.pop("journals", []))
+
+        count = self.upsert_issues(issues)
+        self.set_watermark(project, issues[-1]["updated_on"], journals)
+        self.db.commit()
+
+        return count
+
+    def with_journals(self, redmine, issues):
+        # The issues list can't include journals, each issue is fetched alone
+        def get_issue(issue):
+            return redmine.get_issue(issue["id"], journals=True)
+
+        with ThreadPoolExecutor(max_workers=max(redmine.workers, 1)) as executor:
+            return list(executor.map(get_issue, issues))
+
+
+class IssueFilter:
+    """ SQL conditions for the Redmine issue filter syntax """
+
+    def __init__(self, store):
+        self.store = store
+        self.clauses = []
+        self.params = []
+
+    def add(self, clause, *params):
+        self.clauses.append(clause)
+        self.params.extend(params)
+
+    def ids(self, column, values):
+        if values:
+            placeholders = ", ".join("?" * len(values))
+            self.add(f"{column} IN ({placeholders})", *[int(v) for v in values])
+
+    def assignee(self, value):
+        if value is None:
+            return
+        if value == "*":
+            self.add("assigned_to_id IS NOT NULL")
+        elif value == "!*":
+            self.add("assigned_to_id IS NULL")
+        elif value == "me":
+            self.add("assigned_to_id = ?", self.store.get_meta("current_user"))
+        else:
+            self.ids("assigned_to_id", split(value))
+
+    def status(self, value):
+        # Like the API, only open issues are listed unless asked otherwise
+        value = value or "open"
+        if value == "*":
+            return
+        if value in ("open", "closed"):
+            statuses = self.store.get_meta("statuses", [])
+            closed = [s["id"] for s in statuses if s.get("is_closed")]
+            placeholders = ", ".join("?" * len(closed))
+            negate = "NOT " if value == "open" else ""
+            self.add(f"status_id {negate}IN ({placeholders})", *closed)
+        else:
+            self.ids("status_id", split(value))
+
+    def project(self, value):
+        """ Match the project, given by id or identifier, and its subprojects """
+        if value is None:
+            return
+
+        projects = self.store.get_meta("projects", [])
+        ids = {p["id"] for p in projects if value in (str(p["id"]), p["identifier"])}
+        if not ids and value.isdigit():
+            ids = {int(value)}
+
+        children = {}
+        for p in projects:
+            if p.get("parent"):
+                children.setdefault(p["parent"]["id"], []).append(p["id"])
+
+        pending = list(ids)
+        while pending:
+            for child in children.get(pending.pop(), []):
+                if child not in ids:
+                    ids.add(child)
+                    pending.append(child)
+
+        self.ids("project_id", sorted(ids) or [0])
+
+    def compare(self, column, value, cast=str):
+        """ Handle =, >=, <=, >< (between) and exact values """
+        if value is None:
+            return
+
+        value = str(value)
+        if value.startswith("><"):
+            low, high = value[2:].split("|")
+            self.add(f"{column} >= ?", cast(low))
+            self.upper_bound(column, high, cast)
+        elif value.startswith(">="):
+            self.add(f"{column} >= ?", cast(value[2:]))
+        elif value.startswith("<="):
+            self.upper_bound(column, value[2:], cast)
+        elif value == "*":
+            self.add(f"{column} IS NOT NULL")
+        elif value == "!*":
+            self.add(f"{column} IS NULL")
+        elif is_date(value) and column.endswith("_on"):
+            self.add(f"substr({column}, 1, 10) = ?", value)
+        else:
+            self.add(f"{column} = ?", cast(value))
+
+    def upper_bound(self, column, value, cast):
+        # A date bound on a timestamp column includes the whole day
+        if is_date(value) and column.endswith("_on"):
+            self.add(f"substr({column}, 1, 10) <= ?", value)
+        else:
+            self.add(f"{column} <= ?", cast(value))
+
+
+def split(value):
+    return str(value).split("|") if value is not None else []
+
+
+def is_date(value):
+    return len(value) == 10 and value[4] == "-" and value[7] == "-"
+
+
+def date_filter(kwargs, prefix):
+    """ Same precedence as Redmine.issue_query: on, then before, then after """
+    if kwargs.get(f"{prefix}_on"):
+        return kwargs[f"{prefix}_on"]
+    if kwargs.get(f"{prefix}_before"):
+        return "<=" + kwargs[f"{prefix}_before"]
+    if kwargs.get(f"{prefix}_after"):
+        return ">=" + kwargs[f"{prefix}_after"]
+
+    return None
+
+
+def order_by(sort):
+    terms = []
+    for term in sort.split(","):
+        name, _, direction = term.strip().partition(":")
+        if name not in SORT_COLUMNS:
+            raise ValueError(f"Can't sort by {name} in the local store")
+        direction = "DESC" if direction.lower() == "desc" else "ASC"
+        terms.append(f"{SORT_COLUMNS[name]} {direction}")
+
+    return ", ".join(terms)
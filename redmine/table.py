@@ -0,0 +1,120 @@
+import re
+import shutil
+import sys
+
+import click
+
+from redmine.time import Time
+
+SPEC = re.compile(r"([<>^]?)(\d+)(?:\.(\d+))?$")
+
+# Narrowest a flexible column gets on a small terminal
+MIN_FLEXIBLE_WIDTH = 10
+
+
+class Column:
+    """
+    The value at path in a row (i.e ("project", "name")) formatted with spec
+    and followed by suffix. A flexible column takes the terminal's leftover
+    width.
+    """
+
+    __slots__ = ("path", "spec", "suffix", "flexible")
+
+    def __init__(self, path, spec, suffix=" ", flexible=False):
+        self.path = path
+        self.spec = spec
+        self.suffix = suffix
+        self.flexible = flexible
+
+    def width(self):
+        return int(SPEC.match(self.spec).group(2)) + len(self.suffix)
+
+    def fit(self, width):
+        """ Spec resized to width, truncating one short like the fixed ones """
+        align = SPEC.match(self.spec).group(1)
+        return f"{align}{width}.{width - 1}"
+
+    def getter(self):
+        if len(self.path) == 1:
+            (key,) = self.path
+            return lambda row: row[key]
+
+        outer, inner = self.path
+        # Optional references (i.e assigned_to) are missing, not null
+        return lambda row: row.get(outer, {}).get(inner, "")
+
+
+ISSUES = [
+    Column(("id",), ">6"),
+    Column(("project", "name"), "21.20"),
+    Column(("priority", "name"), "<8"),
+    Column(("status", "name"), "<19"),
+    Column(("done_ratio",), ">3", suffix="% "),
+    Column(("assigned_to", "name"), "<21.20"),
+    Column(("subject",), "<61.60", flexible=True),
+]
+
+# Same layout as Time, from time entries as the API returns them
+TIME_PATHS = {
+    "project": ("project", "name"),
+    "issue": ("issue", "id"),
+    "user": ("user", "name"),
+    "activity": ("activity", "name"),
+    "spent_on": ("spent_on",),
+}
+TIMES = [Column(TIME_PATHS[name], spec) for name, spec in Time.LAYOUT]
+TIMES.append(Column(("hours",), ">6", suffix=" hours"))
+
+
+def terminal_width():
+    """ Width to fit tables to, None when output isn't a terminal """
+    if not sys.stdout.isatty():
+        return None
+
+    return shutil.get_terminal_size().columns
+
+
+class Table:
+    """
+    Rows (dicts as the API returns them) formatted through one precompiled
+    format string and written in batches instead of one write per row.
+    """
+
+    def __init__(self, columns, width=None, batch_size=256):
+        self.getters = [column.getter() for column in columns]
+        self.batch_size = batch_size
+
+        specs = [column.spec for column in columns]
+        flexible = [i for i, column in enumerate(columns) if column.flexible]
+        if width is not None and flexible:
+            i = flexible[0]
+            fixed = sum(c.width() for c in columns) - columns[i].width()
+            available = width - fixed - len(columns[i].suffix)
+            specs[i] = columns[i].fit(max(available, MIN_FLEXIBLE_WIDTH))
+
+        self.format = "".join(
+            f"{{:{spec}}}{column.suffix}" for spec, column in zip(specs, columns)
+        ).format
+
+    def row(self, row):
+        return self.format(*[get(row) for get in self.getters])
+
+    def render(self, rows):
+        """ Yield blocks of up to batch_size formatted lines """
+        fmt = self.format
+        getters = self.getters
+        batch = []
+
+        for row in rows:
+            batch.append(fmt(*[get(row) for get in getters]))
+            if len(batch) >= self.batch_size:
+                yield "\n".join(batch)
+                batch = []
+
+        if batch:
+            yield "\n".join(batch)
+
+    def write(self, rows):
+        for block in self.render(rows):
+            click.echo(block)
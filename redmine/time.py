@@ -1,4 +1,27 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+
 class Time:
+    __slots__ = (
+        "project",
+        "issue",
+        "user",
+        "hours",
+        "activity",
+        "comments",
+        "spent_on",
+    )
+
+    # Columns of a time entry row and their format spec, in display order
+    LAYOUT = (
+        ("project", "<21.20"),
+        ("issue", ">6"),
+        ("user", "<21.20"),
+        ("activity", "<15.14"),
+        ("spent_on", "<11"),
+    )
+
     def __init__(self, *args, **kwargs):
         self.project = kwargs.get("project")
         self.issue = kwargs.get("issue")
@@ -9,11 +32,80 @@ class Time:
         self.spent_on = kwargs.get("spent_on")
 
     def __str__(self):
-        time = f"{self.project['name']:<21.20} "
-        time += f"{self.issue['id']:>6} "
-        time += f"{self.user['name']:<21.20} "
-        time += f"{self.activity['name']:<15.14} "
-        time += f"{self.spent_on:<11} "
-        time += f"{self.hours:>6} hours"
+        return self.format(
+            self.hours,
+            project=self.project["name"],
+            issue=self.issue["id"],
+            user=self.user["name"],
+            activity=self.activity["name"],
+            spent_on=self.spent_on,
+        )
+
+    @classmethod
+    def format(cls, hours, **columns):
+        """ Row with the given columns, in LAYOUT order, followed by hours """
+        time = ""
+        for column, spec in cls.LAYOUT:
+            if column in columns:
+                time += f"{columns[column]:{spec}} "
+        time += f"{hours:>6} hours"
 
         return time
+
+
+class TimeReport:
+    """
+    Hours of time entries summed per group (i.e user and week) as they are
+    added, so entries never need to be kept around.
+    """
+
+    # Group name and the Time column it's shown in
+    GROUPS = {
+        "project": "project",
+        "user": "user",
+        "activity": "activity",
+        "week": "spent_on",
+    }
+
+    def __init__(self, group_by=()):
+        unknown = set(group_by) - set(self.GROUPS)
+        if unknown:
+            raise ValueError(f"Can't group by {', '.join(sorted(unknown))}")
+
+        # Same order as the columns they are displayed in
+        columns = [column for column, _ in Time.LAYOUT]
+        self.group_by = sorted(group_by, key=lambda g: columns.index(self.GROUPS[g]))
+
+        self.hours = defaultdict(float)
+        self.names = {}
+        self.total = 0.0
+
+    def add(self, entry):
+        key = tuple(self.group_key(group, entry) for group in self.group_by)
+        self.hours[key] += entry["hours"]
+        self.total += entry["hours"]
+
+    def group_key(self, group, entry):
+        if group == "week":
+            spent_on = datetime.strptime(entry["spent_on"], "%Y-%m-%d").date()
+            return (spent_on - timedelta(days=spent_on.weekday())).isoformat()
+
+        # Keyed by id, names are kept once per group value
+        value = entry[group]
+        self.names[(group, value["id"])] = value["name"]
+        return value["id"]
+
+    def name(self, group, key):
+        return self.names.get((group, key), key)
+
+    def rows(self):
+        """ Yield (columns, hours) per group, columns named as in Time.LAYOUT """
+        rows = []
+        for key, hours in self.hours.items():
+            columns = {
+                self.GROUPS[group]: self.name(group, value)
+                for group, value in zip(self.group_by, key)
+            }
+            rows.append((columns, round(hours, 2)))
+
+        yield from sorted(rows, key=lambda row: [str(v) for v in row[0].values()])
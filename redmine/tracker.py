@@ -1,4 +1,6 @@
 class Tracker:
+    __slots__ = ("id", "name")
+
     def __init__(self, *args, **kwargs):
         self.id = kwargs.get("id")
         self.name = kwargs.get("name")
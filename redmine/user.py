@@ -1,4 +1,6 @@
 class User:
+    __slots__ = ("id", "name")
+
     def __init__(self, user_id, name):
         self.id = user_id
         self.name = name
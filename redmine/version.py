@@ -1,4 +1,6 @@
 class Version:
+    __slots__ = ("id", "status", "name", "due_date")
+
     def __init__(self, *args, **kwargs):
         self.id = kwargs.get("id")
         self.status = kwargs.get("status")
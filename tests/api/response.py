@@ -2,9 +2,10 @@ from requests.exceptions import HTTPError
 
 
 class MockResponse:
-    def __init__(self, status_code, data):
+    def __init__(self, status_code, data, headers=None):
         self.status_code = status_code
         self.data = data
+        self.headers = headers or {}
 
     def json(self):
         return self.data
@@ -0,0 +1,218 @@
+import asyncio
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from redmine import cache
+from redmine.aio import AsyncRedmine
+from redmine.redmine import Redmine
+
+from ..server import FakeRedmine
+
+aiohttp = pytest.importorskip("aiohttp")
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return tmp_path
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def test_get_issues_pages_concurrently(home):
+    async def main(url):
+        async with AsyncRedmine(url, "API_KEY", concurrency=4) as redmine:
+            return await redmine.get_issues(limit=None)
+
+    with FakeRedmine(issues=250) as server:
+        issues = run(main(server.url))
+
+    assert [i["id"] for i in issues] == list(range(1, 251))
+    assert server.counts["requests"] == 3
+    assert server.counts["connections"] <= 4
+
+
+def test_iter_resource_limit_and_unordered(home):
+    async def main(url):
+        async with AsyncRedmine(url, "API_KEY") as redmine:
+            limited = [i async for i in redmine.iter_resource("issues", limit=150)]
+            unordered = [
+                i async for i in redmine.iter_resource("issues", ordered=False)
+            ]
+            return limited, unordered
+
+    with FakeRedmine(issues=420) as server:
+        limited, unordered = run(main(server.url))
+
+    assert [i["id"] for i in limited] == list(range(1, 151))
+    assert sorted(i["id"] for i in unordered) == list(range(1, 421))
+
+
+def test_concurrency_is_bounded(home):
+    async def main(url):
+        async with AsyncRedmine(url, "API_KEY", concurrency=2) as redmine:
+            return await asyncio.gather(
+                *[redmine.get_issue(i, False) for i in range(1, 21)]
+            )
+
+    with FakeRedmine(issues=20, latency=0.01) as server:
+        issues = run(main(server.url))
+
+    assert [i["id"] for i in issues] == list(range(1, 21))
+    assert server.counts["connections"] <= 2
+
+
+def test_closing_iterator_cancels_pending_pages(home):
+    async def main(url):
+        async with AsyncRedmine(url, "API_KEY", concurrency=2) as redmine:
+            issues = redmine.iter_resource("issues")
+            # Into the second page, so the pages after it are in flight
+            consumed = [await issues.__anext__() for _ in range(101)]
+            await issues.aclose()
+            await asyncio.sleep(0.2)
+            return consumed
+
+    with FakeRedmine(issues=3000, latency=0.05) as server:
+        consumed = run(main(server.url))
+
+    assert consumed[-1]["id"] == 101
+    # The first page and the two pages per slot scheduled before closing
+    assert server.counts["requests"] <= 5
+
+
+def test_cancelling_caller_stops_fetching(home):
+    async def main(url):
+        async with AsyncRedmine(url, "API_KEY", concurrency=2) as redmine:
+            task = asyncio.ensure_future(redmine.get_issues(limit=None))
+            await asyncio.sleep(0.15)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            await asyncio.sleep(0.2)
+
+    with FakeRedmine(issues=3000, latency=0.05) as server:
+        run(main(server.url))
+
+    assert server.counts["requests"] < 30
+
+
+def test_get_shares_cache_with_redmine(home):
+    async def main(url):
+        async with AsyncRedmine(url, "API_KEY") as redmine:
+            return await redmine.get("projects"), await redmine.get("projects")
+
+    with FakeRedmine(projects=150) as server:
+        projects, cached = run(main(server.url))
+        requests = server.counts["requests"]
+        synced = Redmine(server.url, "API_KEY").get("projects")
+
+    assert len(projects) == 150
+    assert cached == synced == projects
+    assert requests == 2
+    assert server.counts["requests"] == 2
+
+
+def test_stale_entry_is_revalidated(home):
+    async def main(url):
+        async with AsyncRedmine(url, "API_KEY") as redmine:
+            await redmine.get("projects")
+            past = time.time() - cache.ttl("projects") - 1
+            os.utime(redmine.cache_file("projects"), (past, past))
+            return redmine, await redmine.get("projects")
+
+    with FakeRedmine(projects=150) as server:
+        redmine, projects = run(main(server.url))
+
+    assert len(projects) == 150
+    # Both pages answered 304 and the cached copy is fresh again
+    assert server.counts["requests"] == 4
+    assert server.counts["not_modified"] == 2
+    assert cache.state(redmine.cache_file("projects"), "projects") == cache.FRESH
+
+
+def test_cache_io_runs_off_the_event_loop(home):
+    threads = set()
+
+    def read_cache(self, cache_file):
+        threads.add(threading.current_thread())
+        return Redmine.read_cache(self, cache_file)
+
+    async def main(url):
+        async with AsyncRedmine(url, "API_KEY") as redmine:
+            await redmine.get("projects")
+            await redmine.get("projects")
+
+    with patch.object(AsyncRedmine, "read_cache", read_cache):
+        with FakeRedmine() as server:
+            run(main(server.url))
+
+    assert threads and threading.main_thread() not in threads
+
+
+def test_get_users(home):
+    async def main(url):
+        async with AsyncRedmine(url, "API_KEY") as redmine:
+            return await redmine.get_users()
+
+    with FakeRedmine(users=3) as server:
+        users = run(main(server.url))
+
+    assert users == {"1": "User 1", "2": "User 2", "3": "User 3", "4": "Developers"}
+
+
+def test_get_users_falls_back_to_memberships(home, monkeypatch):
+    def forbidden(self, params, body):
+        return 403, None
+
+    monkeypatch.setattr(FakeRedmine, "list_users", forbidden)
+
+    async def main(url):
+        async with AsyncRedmine(url, "API_KEY") as redmine:
+            return await redmine.get_users()
+
+    with FakeRedmine(projects=3, users=5) as server:
+        users = run(main(server.url))
+
+    assert users == {str(i): f"User {i}" for i in range(1, 6)}
+
+
+def test_writes(home):
+    async def main(url):
+        async with AsyncRedmine(url, "API_KEY") as redmine:
+            created = await redmine.create_issue(subject="New", project=1)
+            updated = await redmine.update_issue(created["id"], note="x")
+            entry = await redmine.create_time_entry(created["id"], 1.5, comment="y")
+            issue = await redmine.get_issue(created["id"], journals=True)
+            return created, updated, entry, issue
+
+    with FakeRedmine(issues=2) as server:
+        created, updated, entry, issue = run(main(server.url))
+
+    assert created["id"] == 3
+    assert created["subject"] == "New"
+    assert updated is True
+    assert entry["time_entry"]["hours"] == 1.5
+    assert entry["time_entry"]["issue"]["id"] == 3
+    assert issue["journals"] == []
+
+
+def test_errors_raise(home):
+    async def main(url):
+        async with AsyncRedmine(url, "API_KEY") as redmine:
+            await redmine.create_issue(project=1)
+
+    with FakeRedmine() as server:
+        with pytest.raises(aiohttp.ClientResponseError) as e:
+            run(main(server.url))
+
+    assert e.value.status == 422
@@ -0,0 +1,96 @@
+from unittest.mock import patch
+
+from requests.exceptions import ConnectionError, HTTPError
+
+from redmine import bulk
+
+from .response import MockResponse
+
+
+class ErrorResponse(MockResponse):
+    def __init__(self, status_code, data, headers=None):
+        super().__init__(status_code, data, headers)
+        self.content = str(data).replace("'", '"')
+
+
+def http_error(status_code, data=None):
+    return HTTPError(response=ErrorResponse(status_code, data or {}))
+
+
+def test_run_yields_every_item():
+    results = list(bulk.run(lambda x: x * 2, range(20), workers=4))
+
+    assert sorted((item, result) for item, result, _ in results) == [
+        (i, i * 2) for i in range(20)
+    ]
+
+
+def test_run_keeps_going_after_errors():
+    def update(issue_id):
+        if issue_id == 2:
+            raise http_error(422, {"errors": ["Status is invalid"]})
+        return True
+
+    results = bulk.run(update, [1, 2, 3])
+    results = {item: (result, error) for item, result, error in results}
+
+    assert results[1] == (True, None)
+    assert results[3] == (True, None)
+    assert bulk.error_messages(results[2][1]) == ["Status is invalid"]
+
+
+def test_run_retries_transient_errors():
+    calls = []
+
+    def update(issue_id):
+        calls.append(issue_id)
+        if len(calls) < 3:
+            raise ConnectionError("reset")
+        return True
+
+    with patch("time.sleep") as mock_sleep:
+        results = list(bulk.run(update, [1], retries=2, backoff=0.1))
+
+    assert results == [(1, True, None)]
+    assert [c[0][0] for c in mock_sleep.call_args_list] == [0.1, 0.2]
+
+
+def test_run_does_not_retry_client_errors():
+    calls = []
+
+    def update(issue_id):
+        calls.append(issue_id)
+        raise http_error(404)
+
+    results = list(bulk.run(update, [1], retries=3))
+
+    assert len(calls) == 1
+    assert isinstance(results[0][2], HTTPError)
+
+
+def test_is_throttled_only_retries_unprocessed_requests():
+    assert bulk.is_throttled(http_error(429))
+    assert bulk.is_throttled(http_error(503))
+    assert not bulk.is_throttled(http_error(500))
+    assert not bulk.is_throttled(ConnectionError("reset"))
+
+
+def test_retry_delay_honours_retry_after():
+    error = HTTPError(response=MockResponse(429, {}, {"Retry-After": "7"}))
+
+    assert bulk.is_transient(error)
+    assert bulk.retry_delay(error, 0, 0.5) == 7
+
+
+def test_run_takes_items_lazily():
+    taken = []
+
+    def items():
+        for i in range(100):
+            taken.append(i)
+            yield i
+
+    results = bulk.run(lambda x: x, items(), workers=2)
+    next(results)
+
+    assert len(taken) <= 5
@@ -0,0 +1,200 @@
+import os
+import time
+from unittest.mock import patch
+
+from redmine import cache
+from redmine.redmine import Redmine
+
+from .response import MockResponse
+
+
+def make_redmine(tmp_path):
+    redmine = Redmine("http://example.com", "API_KEY")
+    redmine.cache_dir = str(tmp_path)
+    return redmine
+
+
+def age(path, seconds):
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_ttl_per_resource():
+    assert cache.ttl("issue_statuses") == 7 * cache.DAY
+    assert cache.ttl("projects") == 6 * cache.HOUR
+    assert cache.ttl("queries") == 10 * cache.MINUTE
+    assert cache.ttl("projects/12/versions") == cache.TTL["versions"]
+    assert cache.ttl("unknown") == cache.DEFAULT_TTL
+
+
+def test_state(tmp_path):
+    cache_file = str(tmp_path / "queries.json")
+    assert cache.state(cache_file, "queries") is None
+
+    open(cache_file, "w").close()
+    assert cache.state(cache_file, "queries") == cache.FRESH
+
+    age(cache_file, cache.ttl("queries") + 1)
+    assert cache.state(cache_file, "queries") == cache.STALE
+
+    age(cache_file, cache.ttl("queries") * cache.STALE_FACTOR + 1)
+    assert cache.state(cache_file, "queries") == cache.EXPIRED
+
+
+def test_get_serves_fresh_entry_without_fetching(tmp_path):
+    redmine = make_redmine(tmp_path)
+    redmine.set_cache(str(tmp_path / "queries.json"), {"queries": [{"id": 1}]})
+
+    with patch.object(Redmine, "fetch") as mock_fetch:
+        assert redmine.get("queries") == [{"id": 1}]
+
+    mock_fetch.assert_not_called()
+
+
+def test_get_serves_stale_entry_and_refreshes_it(tmp_path):
+    redmine = make_redmine(tmp_path)
+    cache_file = str(tmp_path / "queries.json")
+    redmine.set_cache(cache_file, {"queries": [{"id": 1}]})
+    age(cache_file, cache.ttl("queries") + 1)
+
+    with patch.object(Redmine, "fetch", return_value={"queries": [{"id": 2}]}):
+        with patch("threading.Thread.start", lambda t: t.run()):
+            assert redmine.get("queries") == [{"id": 1}]
+
+    assert cache.state(cache_file, "queries") == cache.FRESH
+    assert redmine.get("queries") == [{"id": 2}]
+
+
+def test_failed_background_refresh_keeps_stale_entry(tmp_path):
+    redmine = make_redmine(tmp_path)
+    cache_file = str(tmp_path / "queries.json")
+    redmine.set_cache(cache_file, {"queries": [{"id": 1}]})
+    age(cache_file, cache.ttl("queries") + 1)
+
+    # i.e a proxy's HTML error page where JSON was expected
+    with patch.object(Redmine, "fetch", side_effect=ValueError("not JSON")):
+        with patch("threading.Thread.start", lambda t: t.run()):
+            assert redmine.get("queries") == [{"id": 1}]
+
+    assert cache.state(cache_file, "queries") == cache.STALE
+
+
+def test_exit_waits_a_bounded_time_for_refreshes(tmp_path):
+    redmine = make_redmine(tmp_path)
+
+    with patch("atexit.register") as mock_register:
+        redmine.refresh_later("queries.json", time.sleep, 5)
+        redmine.refresh_later("queries.json", time.sleep, 5)
+
+    start = time.monotonic()
+    redmine.wait_for_refreshes(timeout=0.1)
+
+    assert time.monotonic() - start < 1
+    assert list(redmine._refreshing.values())[0].daemon
+    mock_register.assert_called_once_with(redmine.wait_for_refreshes)
+
+
+def test_get_evicts_expired_entry(tmp_path):
+    redmine = make_redmine(tmp_path)
+    cache_file = str(tmp_path / "queries.json")
+    redmine.set_cache(cache_file, {"queries": [{"id": 1}]})
+    redmine.set_cache(str(tmp_path / "projects.json"), {"projects": []})
+    age(cache_file, cache.ttl("queries") * cache.STALE_FACTOR + 1)
+
+    with patch.object(Redmine, "fetch", return_value={"queries": [{"id": 2}]}):
+        assert redmine.get("queries") == [{"id": 2}]
+
+    assert os.path.exists(tmp_path / "projects.json")
+
+
+def test_namespace_differs_per_url_and_key():
+    first = cache.namespace("https://one.example.com", "KEY")
+
+    assert first.startswith("one.example.com-")
+    assert first == cache.namespace("https://one.example.com", "KEY")
+    assert first != cache.namespace("https://one.example.com", "OTHER_KEY")
+    assert first != cache.namespace("https://two.example.com", "KEY")
+
+
+def test_key_includes_full_path_and_params():
+    assert cache.key("projects") == "projects.json"
+    assert cache.key("projects/12/versions") == "projects/12/versions.json"
+    assert cache.key("projects/12/versions") != cache.key("projects/40/versions")
+    assert cache.key("projects", status=1) != cache.key("projects", status=5)
+    assert cache.key("projects", a=1, b=2) == cache.key("projects", b=2, a=1)
+    assert cache.key("projects", status=None) == cache.key("projects")
+
+
+def test_get_caches_nested_resources_separately(tmp_path):
+    redmine = make_redmine(tmp_path)
+    responses = [{"versions": [{"id": 1}]}, {"versions": [{"id": 2}]}]
+
+    with patch.object(Redmine, "fetch", side_effect=responses):
+        assert redmine.get("projects/12/versions") == [{"id": 1}]
+        assert redmine.get("projects/40/versions") == [{"id": 2}]
+
+    assert redmine.get("projects/12/versions") == [{"id": 1}]
+    assert redmine.get("projects/40/versions") == [{"id": 2}]
+
+
+def test_accounts_do_not_share_cache(tmp_path):
+    with patch.dict(os.environ, {"HOME": str(tmp_path)}):
+        first = Redmine("https://one.example.com", "KEY")
+        second = Redmine("https://two.example.com", "KEY")
+
+    with patch.object(Redmine, "fetch", return_value={"projects": [{"id": 1}]}):
+        first.get("projects")
+
+    with patch.object(Redmine, "fetch", return_value={"projects": [{"id": 2}]}):
+        assert second.get("projects") == [{"id": 2}]
+
+
+def test_refresh_stores_validators(tmp_path):
+    redmine = make_redmine(tmp_path)
+    response = MockResponse(200, {"queries": [{"id": 1}]}, {"ETag": 'W/"v1"'})
+
+    with patch.object(redmine.session, "get", return_value=response):
+        redmine.get("queries")
+
+    validators_file = redmine.validators_file(redmine.cache_file("queries"))
+    assert redmine.read_cache(validators_file) == [
+        {"offset": 0, "etag": 'W/"v1"', "last_modified": None}
+    ]
+
+
+def test_revalidate_not_modified_extends_freshness(tmp_path):
+    redmine = make_redmine(tmp_path)
+    cache_file = redmine.cache_file("queries")
+    response = MockResponse(200, {"queries": [{"id": 1}]}, {"ETag": 'W/"v1"'})
+
+    with patch.object(redmine.session, "get", return_value=response):
+        redmine.get("queries")
+    age(cache_file, cache.ttl("queries") + 1)
+
+    with patch.object(
+        redmine.session, "get", return_value=MockResponse(304, None)
+    ) as mock_get:
+        data = redmine.revalidate(cache_file, "queries")
+
+    assert data == {"queries": [{"id": 1}]}
+    assert mock_get.call_args[1]["headers"] == {"If-None-Match": 'W/"v1"'}
+    assert cache.state(cache_file, "queries") == cache.FRESH
+
+
+def test_revalidate_modified_downloads_again(tmp_path):
+    redmine = make_redmine(tmp_path)
+    cache_file = redmine.cache_file("queries")
+    first = MockResponse(200, {"queries": [{"id": 1}]}, {"ETag": 'W/"v1"'})
+    second = MockResponse(200, {"queries": [{"id": 2}]}, {"ETag": 'W/"v2"'})
+
+    with patch.object(redmine.session, "get", return_value=first):
+        redmine.get("queries")
+
+    with patch.object(redmine.session, "get", side_effect=[second, second]):
+        data = redmine.revalidate(cache_file, "queries")
+
+    assert data == {"queries": [{"id": 2}]}
+    assert redmine.read_cache(cache_file) == data
+    assert redmine.read_cache(redmine.validators_file(cache_file))[0]["etag"] == (
+        'W/"v2"'
+    )
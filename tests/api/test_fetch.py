@@ -12,7 +12,7 @@ redmine = Redmine(
 )
 
 
-@patch("redmine.redmine.requests.get")
+@patch.object(redmine.session, "get")
 def test_fetch(mock_get):
     expected = {
         "projects": [
@@ -46,7 +46,7 @@ def test_fetch(mock_get):
     assert response == expected
 
 
-@patch("redmine.redmine.requests.get")
+@patch.object(redmine.session, "get")
 def test_fetch_with_empty_response(mock_get):
     expected = {}
     mock_get.return_value = MockResponse(200, expected)
@@ -56,7 +56,7 @@ def test_fetch_with_empty_response(mock_get):
     assert response == expected
 
 
-@patch("redmine.redmine.requests.get")
+@patch.object(redmine.session, "get")
 def test_fetch_with_server_error(mock_get):
     mock_get.return_value = MockResponse(500, {})
 
@@ -64,7 +64,7 @@ def test_fetch_with_server_error(mock_get):
         redmine.fetch("projects")
 
 
-@patch("redmine.redmine.requests.get")
+@patch.object(redmine.session, "get")
 def test_fetch_with_bad_request(mock_get):
     mock_get.return_value = MockResponse(400, {})
 
@@ -72,7 +72,7 @@ def test_fetch_with_bad_request(mock_get):
         redmine.fetch("projects")
 
 
-@patch("redmine.redmine.requests.get")
+@patch.object(redmine.session, "get")
 def test_fetch_with_not_found(mock_get):
     mock_get.return_value = MockResponse(404, {})
 
@@ -1,5 +1,5 @@
 import os
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 from redmine.redmine import Redmine
 
@@ -12,10 +12,8 @@ def test_get_projects_calls_fetch_when_no_cache():
     resource = "projects"
 
     with patch.object(Redmine, "fetch") as mock_fetch:
-        import os
-
-        os.path.exists = MagicMock(return_value=False)
-        redmine.get(resource)
+        with patch("os.path.exists", return_value=False):
+            redmine.get(resource)
 
     mock_fetch.assert_called_once_with(resource)
 
@@ -26,8 +24,8 @@ def test_get_projects_calls_set_cache_when_no_cache():
 
     with patch.object(Redmine, "fetch", return_value=data):
         with patch.object(Redmine, "set_cache") as mock_cache:
-            os.path.exists = MagicMock(return_value=False)
-            redmine.get(resource)
+            with patch("os.path.exists", return_value=False):
+                redmine.get(resource)
 
     cache_file = os.path.join(redmine.cache_dir, "{}.json".format(resource))
 
@@ -38,10 +36,8 @@ def test_get_trackers_calls_fetch_when_no_cache():
     resource = "trackers"
 
     with patch.object(Redmine, "fetch") as mock_fetch:
-        import os
-
-        os.path.exists = MagicMock(return_value=False)
-        redmine.get(resource)
+        with patch("os.path.exists", return_value=False):
+            redmine.get(resource)
 
     mock_fetch.assert_called_once_with(resource)
 
@@ -52,8 +48,8 @@ def test_get_trackers_calls_set_cache_when_no_cache():
 
     with patch.object(Redmine, "fetch", return_value=data):
         with patch.object(Redmine, "set_cache") as mock_cache:
-            os.path.exists = MagicMock(return_value=False)
-            redmine.get(resource)
+            with patch("os.path.exists", return_value=False):
+                redmine.get(resource)
 
     cache_file = os.path.join(redmine.cache_dir, "{}.json".format(resource))
 
@@ -64,10 +60,8 @@ def test_get_statuses_calls_fetch_when_no_cache():
     resource = "statuses"
 
     with patch.object(Redmine, "fetch") as mock_fetch:
-        import os
-
-        os.path.exists = MagicMock(return_value=False)
-        redmine.get(resource)
+        with patch("os.path.exists", return_value=False):
+            redmine.get(resource)
 
     mock_fetch.assert_called_once_with(resource)
 
@@ -78,8 +72,8 @@ def test_get_statuses_calls_set_cache_when_no_cache():
 
     with patch.object(Redmine, "fetch", return_value=data):
         with patch.object(Redmine, "set_cache") as mock_cache:
-            os.path.exists = MagicMock(return_value=False)
-            redmine.get(resource)
+            with patch("os.path.exists", return_value=False):
+                redmine.get(resource)
 
     cache_file = os.path.join(redmine.cache_dir, "{}.json".format(resource))
 
@@ -90,10 +84,8 @@ def test_get_priorities_calls_fetch_when_no_cache():
     resource = "enumerations/priorities"
 
     with patch.object(Redmine, "fetch") as mock_fetch:
-        import os
-
-        os.path.exists = MagicMock(return_value=False)
-        redmine.get(resource)
+        with patch("os.path.exists", return_value=False):
+            redmine.get(resource)
 
     mock_fetch.assert_called_once_with(resource)
 
@@ -104,8 +96,8 @@ def test_get_priorities_calls_set_cache_when_no_cache():
 
     with patch.object(Redmine, "fetch", return_value=data):
         with patch.object(Redmine, "set_cache") as mock_cache:
-            os.path.exists = MagicMock(return_value=False)
-            redmine.get(resource)
+            with patch("os.path.exists", return_value=False):
+                redmine.get(resource)
 
     cache_file = os.path.join(redmine.cache_dir, "{}.json".format(resource))
 
@@ -116,10 +108,8 @@ def test_get_queries_calls_fetch_when_no_cache():
     resource = "queries"
 
     with patch.object(Redmine, "fetch") as mock_fetch:
-        import os
-
-        os.path.exists = MagicMock(return_value=False)
-        redmine.get(resource)
+        with patch("os.path.exists", return_value=False):
+            redmine.get(resource)
 
     mock_fetch.assert_called_once_with(resource)
 
@@ -130,8 +120,8 @@ def test_get_queries_calls_set_cache_when_no_cache():
 
     with patch.object(Redmine, "fetch", return_value=data):
         with patch.object(Redmine, "set_cache") as mock_cache:
-            os.path.exists = MagicMock(return_value=False)
-            redmine.get(resource)
+            with patch("os.path.exists", return_value=False):
+                redmine.get(resource)
 
     cache_file = os.path.join(redmine.cache_dir, "{}.json".format(resource))
 
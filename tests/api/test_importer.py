@@ -0,0 +1,146 @@
+import io
+from unittest.mock import MagicMock, patch
+
+import pytest
+from requests.exceptions import HTTPError
+
+from redmine import importer
+from redmine.redmine import Redmine
+
+from .response import MockResponse
+
+redmine = Redmine("http://example.com", "API_KEY", workers=4)
+
+CSV = """subject,project,tracker_id,cf:3,assignee
+First,88,1,high,
+Second,88,2,,12
+Third,90,1,low,
+"""
+
+
+def test_read_rows_csv():
+    rows = list(importer.read_rows(io.StringIO(CSV), "csv"))
+
+    assert [number for number, _ in rows] == [1, 2, 3]
+    assert rows[1][1]["subject"] == "Second"
+
+
+def test_read_rows_jsonl_skips_blank_lines():
+    jsonl = '{"subject": "First"}\n\n{"subject": "Second"}\n'
+    rows = list(importer.read_rows(io.StringIO(jsonl), "jsonl"))
+
+    assert rows == [(1, {"subject": "First"}), (2, {"subject": "Second"})]
+
+
+def test_detect_format():
+    assert importer.detect_format("issues.jsonl") == "jsonl"
+    assert importer.detect_format("issues.csv") == "csv"
+
+
+def test_issue_fields_maps_columns_and_custom_fields():
+    row = {"subject": "First", "tracker_id": "1", "cf:3": "high", "assignee": ""}
+    fields = importer.issue_fields(row, {"project": "88", "status": None})
+
+    assert fields == {
+        "subject": "First",
+        "tracker": "1",
+        "project": "88",
+        "cf": [("3", "high")],
+    }
+
+    row = {"subject": "S", "custom_fields": [{"id": 4, "value": "x"}]}
+    assert importer.issue_fields(row)["cf"] == [(4, "x")]
+
+
+def test_import_issues_checkpoints_and_resumes(tmp_path):
+    checkpoint_path = str(tmp_path / "issues.csv.checkpoint")
+    created = []
+
+    def create_issue(**kwargs):
+        if kwargs["subject"] == "Second" and "Second-failed" not in created:
+            created.append("Second-failed")
+            raise HTTPError(response=MockResponse(422, {}))
+        created.append(kwargs["subject"])
+        return {"id": 100 + len(created), "subject": kwargs["subject"]}
+
+    with patch.object(Redmine, "create_issue", side_effect=create_issue):
+        with importer.Checkpoint(checkpoint_path) as checkpoint:
+            rows = importer.read_rows(io.StringIO(CSV), "csv")
+            results = list(importer.import_issues(redmine, rows, checkpoint))
+
+        assert sorted(n for n, _, error in results if error is None) == [1, 3]
+
+        with importer.Checkpoint(checkpoint_path) as checkpoint:
+            rows = importer.read_rows(io.StringIO(CSV), "csv")
+            results = list(importer.import_issues(redmine, rows, checkpoint))
+
+    assert [(n, error) for n, _, error in results] == [(2, None)]
+    assert sorted(created) == ["First", "Second", "Second-failed", "Third"]
+    assert importer.Checkpoint(checkpoint_path).done == {1, 2, 3}
+
+
+TIMES = """issue,hours,on,activity,comment
+12,1.5,2020-03-02,9,Review
+12,1.5,2020-03-02,9,Review
+13,2h,2020-03-03,9,
+14,1,2020-03-03,99,
+15,0.5,2020-03-04,,Call
+16,1:30,2020-03-04,,
+17,soon,2020-03-04,,
+"""
+
+
+def test_import_time_entries_validates_and_deduplicates():
+    logged = [
+        {
+            "issue": {"id": 13},
+            "user": {"id": 5},
+            "hours": 2.0,
+            "comments": "",
+            "spent_on": "2020-03-03",
+        }
+    ]
+    created = []
+
+    def fetch(resource, **kwargs):
+        assert resource == "users/current"
+        return {"user": {"id": 5}}
+
+    def iter_resource(resource, **kwargs):
+        assert kwargs == {"user_id": 5, "from": "2020-03-02", "to": "2020-03-04"}
+        return iter(logged)
+
+    def create_time_entry(**kwargs):
+        created.append(kwargs)
+        return {"time_entry": {"id": len(created)}}
+
+    with patch.multiple(
+        Redmine,
+        get=MagicMock(return_value=[{"id": 9}]),
+        fetch=MagicMock(side_effect=fetch),
+        iter_resource=MagicMock(side_effect=iter_resource),
+        create_time_entry=MagicMock(side_effect=create_time_entry),
+    ):
+        rows = importer.read_rows(io.StringIO(TIMES), "csv")
+        results = {n: e for n, _, e in importer.import_time_entries(redmine, rows)}
+
+    assert results[1] is None and results[5] is None
+    assert isinstance(results[2], importer.DuplicateEntry)
+    assert isinstance(results[3], importer.DuplicateEntry)
+    assert isinstance(results[4], ValueError)
+    assert results[6] is None
+    assert isinstance(results[7], ValueError)
+    assert sorted((e["issue_id"], e["hours"]) for e in created) == [
+        ("12", 1.5),
+        ("15", 0.5),
+        ("16", 1.5),
+    ]
+
+
+def test_parse_hours():
+    for value in ("1.5", "1,5", "1.5h", "1:30", "1h30", "1h 30m", "90min", 1.5):
+        assert importer.parse_hours(value) == 1.5
+
+    for value in ("", "soon", "-1", "1:xx"):
+        with pytest.raises(ValueError):
+            importer.parse_hours(value)
@@ -0,0 +1,111 @@
+from unittest.mock import patch
+
+from redmine.redmine import Redmine
+
+redmine = Redmine("http://example.com", "API_KEY")
+
+
+def page(resource, start, stop, total_count):
+    return {
+        resource: [{"id": i} for i in range(start, stop)],
+        "total_count": total_count,
+        "offset": start,
+        "limit": 100,
+    }
+
+
+def test_iter_resource_walks_all_pages():
+    pages = [page("projects", 0, 100, 250), page("projects", 100, 200, 250)]
+    pages.append(page("projects", 200, 250, 250))
+
+    with patch.object(Redmine, "fetch", side_effect=pages) as mock_fetch:
+        projects = list(redmine.iter_resource("projects"))
+
+    assert [p["id"] for p in projects] == list(range(250))
+    assert [c[1]["offset"] for c in mock_fetch.call_args_list] == [0, 100, 200]
+
+
+def test_iter_resource_stops_at_limit():
+    pages = [page("issues", 0, 100, 1000), page("issues", 100, 130, 1000)]
+
+    with patch.object(Redmine, "fetch", side_effect=pages) as mock_fetch:
+        issues = list(redmine.iter_resource("issues", limit="130"))
+
+    assert len(issues) == 130
+    assert [c[1]["limit"] for c in mock_fetch.call_args_list] == [100, 30]
+
+
+def test_iter_resource_without_total_count():
+    data = {"issue_statuses": [{"id": 1}, {"id": 2}]}
+
+    with patch.object(Redmine, "fetch", return_value=data) as mock_fetch:
+        statuses = list(redmine.iter_resource("issue_statuses"))
+
+    assert statuses == data["issue_statuses"]
+    mock_fetch.assert_called_once()
+
+
+def test_iter_resource_is_lazy():
+    pages = [page("time_entries", 0, 100, 200), page("time_entries", 100, 200, 200)]
+
+    with patch.object(Redmine, "fetch", side_effect=pages) as mock_fetch:
+        entries = redmine.iter_resource("time_entries")
+        next(entries)
+
+    mock_fetch.assert_called_once()
+
+
+def test_iter_issues_translates_filters():
+    data = page("issues", 0, 3, 3)
+
+    with patch.object(Redmine, "fetch", return_value=data) as mock_fetch:
+        issues = redmine.get_issues(
+            assignee="me", updated_after="2020-01-01", limit=25, sort="id:desc"
+        )
+
+    assert len(issues) == 3
+    params = mock_fetch.call_args[1]
+    assert params["assigned_to_id"] == "me"
+    assert params["updated_on"] == ">=2020-01-01"
+    assert params["limit"] == 25
+    assert params["offset"] == 0
+
+
+def test_get_fetches_remaining_pages():
+    pages = [page("projects", 0, 100, 150), page("projects", 100, 150, 150)]
+
+    with patch.object(Redmine, "fetch", side_effect=pages):
+        with patch("os.path.exists", return_value=False):
+            projects = redmine.get("projects", cache=False)
+
+    assert [p["id"] for p in projects] == list(range(150))
+
+
+def fake_fetch(total_count):
+    def fetch(resource, offset=0, limit=100, **kwargs):
+        return page(resource, offset, min(offset + limit, total_count), total_count)
+
+    return fetch
+
+
+def test_iter_resource_with_workers_keeps_order():
+    with patch.object(Redmine, "fetch", side_effect=fake_fetch(1050)) as mock_fetch:
+        issues = list(redmine.iter_resource("issues", workers=4))
+
+    assert [i["id"] for i in issues] == list(range(1050))
+    assert mock_fetch.call_count == 11
+
+
+def test_iter_resource_with_workers_unordered():
+    with patch.object(Redmine, "fetch", side_effect=fake_fetch(1050)):
+        issues = list(redmine.iter_resource("issues", workers=4, ordered=False))
+
+    assert sorted(i["id"] for i in issues) == list(range(1050))
+
+
+def test_iter_resource_with_workers_stops_at_limit():
+    with patch.object(Redmine, "fetch", side_effect=fake_fetch(1050)) as mock_fetch:
+        issues = list(redmine.iter_resource("issues", limit=250, workers=4))
+
+    assert [i["id"] for i in issues] == list(range(250))
+    assert [c[1]["limit"] for c in mock_fetch.call_args_list] == [100, 100, 50]
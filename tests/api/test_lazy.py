@@ -0,0 +1,42 @@
+from unittest.mock import patch
+
+from redmine.redmine import Redmine
+
+
+def test_init_does_not_fetch_reference_data():
+    with patch.object(Redmine, "get") as mock_get:
+        with patch.object(Redmine, "get_users") as mock_get_users:
+            Redmine("http://example.com", "API_KEY")
+
+    mock_get.assert_not_called()
+    mock_get_users.assert_not_called()
+
+
+def test_statuses_are_fetched_once_on_first_access():
+    redmine = Redmine("http://example.com", "API_KEY")
+    statuses = [{"id": 1, "name": "New"}]
+
+    with patch.object(Redmine, "get", return_value=statuses) as mock_get:
+        assert redmine.statuses == statuses
+        assert redmine.statuses == statuses
+
+    mock_get.assert_called_once_with("issue_statuses")
+
+
+def test_priorities_are_fetched_on_first_access():
+    redmine = Redmine("http://example.com", "API_KEY")
+
+    with patch.object(Redmine, "get", return_value=[]) as mock_get:
+        redmine.priorities
+
+    mock_get.assert_called_once_with("enumerations/issue_priorities")
+
+
+def test_users_are_fetched_on_first_access():
+    redmine = Redmine("http://example.com", "API_KEY")
+
+    with patch.object(Redmine, "get_users", return_value={}) as mock_get_users:
+        redmine.users
+        redmine.users
+
+    mock_get_users.assert_called_once_with()
@@ -0,0 +1,96 @@
+import pytest
+import requests
+from click.testing import CliRunner
+
+from redmine import bulk
+from redmine.cli.main import cli
+from redmine.issue import Issue
+from redmine.redmine import Redmine
+
+from ..server import FakeRedmine
+
+
+@pytest.fixture
+def home(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    return tmp_path
+
+
+def test_iter_issues_pages_over_http(home):
+    with FakeRedmine(issues=250) as server:
+        redmine = Redmine(server.url, "API_KEY", workers=4)
+        issues = list(redmine.iter_issues(limit=None, status_id="*"))
+
+    assert [i["id"] for i in issues] == list(range(1, 251))
+    assert server.counts["requests"] == 3
+    # Pages share the pool's keep-alive connections
+    assert server.counts["connections"] <= 4
+
+
+def test_revalidate_unchanged_resource(home):
+    with FakeRedmine(projects=150) as server:
+        redmine = Redmine(server.url, "API_KEY")
+        projects = redmine.get("projects")
+        data = redmine.revalidate(redmine.cache_file("projects"), "projects")
+
+    assert len(projects) == 150
+    assert data["projects"] == projects
+    assert server.counts["not_modified"] == 2
+
+
+def test_bulk_update_retries_injected_errors(home):
+    with FakeRedmine(issues=40, error_rate=0.3) as server:
+        redmine = Redmine(server.url, "API_KEY", workers=4)
+        results = list(
+            bulk.run(
+                lambda i: redmine.update_issue(i, note="x"),
+                range(1, 41),
+                workers=4,
+                retries=10,
+                backoff=0.001,
+            )
+        )
+
+    assert [error for _, _, error in results] == [None] * 40
+    assert server.counts["errors"] > 0
+
+
+def test_rate_limit(home):
+    with FakeRedmine(rate_limit=2) as server:
+        statuses = [
+            requests.get(f"{server.url}/issue_statuses.json").status_code
+            for _ in range(3)
+        ]
+
+    # Unless the second ticked over between requests
+    assert statuses in ([200, 200, 429], [200, 200, 200])
+    assert server.counts["throttled"] == statuses.count(429)
+
+
+def test_created_issue_is_shaped_like_shown_ones(home):
+    with FakeRedmine(issues=2, projects=2) as server:
+        redmine = Redmine(server.url, "API_KEY")
+        created = redmine.create_issue(subject="New", project="project-2", assignee=3)
+        shown = redmine.get_issue(created["id"], journals=False)
+
+    assert created == shown
+    assert created["project"] == {"id": 2, "name": "Project 2"}
+    assert created["assigned_to"] == {"id": 3, "name": "User 3"}
+    assert created["status"]["name"] == "New"
+    # What import issues prints for every created issue
+    assert Issue(**created).as_row()
+
+
+def test_import_issues_cli(home, tmp_path):
+    rows = tmp_path / "issues.csv"
+    rows.write_text("subject,project,tracker_id\nFirst,1,2\nSecond,project-1,\n")
+
+    with FakeRedmine(projects=1) as server:
+        env = {"REDMINE_URL": server.url, "REDMINE_API_KEY": "API_KEY"}
+        result = CliRunner().invoke(cli, ["import", "issues", str(rows)], env=env)
+
+    assert result.exit_code == 0, result.output
+    assert "2 issues created, 0 failed" in result.output
+    # Rows are created concurrently, so ids follow whichever finished first
+    trackers = {i["subject"]: i["tracker"]["name"] for i in server.data["issues"]}
+    assert trackers == {"First": "Feature", "Second": "Bug"}
@@ -0,0 +1,242 @@
+from unittest.mock import patch
+
+import pytest
+
+from redmine.issue import Issue
+from redmine.redmine import Redmine
+from redmine.store import IssueStore
+
+from ..server import FakeRedmine
+
+redmine = Redmine("http://example.com", "API_KEY")
+
+
+def issue(issue_id, updated_on, **kwargs):
+    return {
+        "id": issue_id,
+        "project": {"id": 1, "name": "Project"},
+        "tracker": {"id": 2, "name": "Bug"},
+        "status": {"id": 3, "name": "New"},
+        "priority": {"id": 4, "name": "Normal"},
+        "author": {"id": 5, "name": "Alice"},
+        "assigned_to": {"id": 6, "name": "Bob"},
+        "subject": f"Issue {issue_id}",
+        "description": "",
+        "done_ratio": 0,
+        "created_on": "2020-01-01T00:00:00Z",
+        "updated_on": updated_on,
+        **kwargs,
+    }
+
+
+def test_sync_stores_issues_and_watermark():
+    store = IssueStore(":memory:")
+    issues = [issue(1, "2020-01-01T00:00:00Z"), issue(2, "2020-01-02T00:00:00Z")]
+
+    with patch.object(Redmine, "iter_resource", return_value=iter(issues)) as mock:
+        assert store.sync(redmine, "project") == 2
+
+    params = mock.call_args[1]
+    assert params["status_id"] == "*"
+    assert params["sort"] == "updated_on:asc"
+    assert "updated_on" not in params
+    assert store.watermark("project") == "2020-01-02T00:00:00Z"
+    assert store.issue(2)["assigned_to_id"] == 6
+    assert store.projects() == ["project"]
+
+
+def test_sync_is_incremental():
+    store = IssueStore(":memory:")
+
+    with patch.object(
+        Redmine, "iter_resource", return_value=iter([issue(1, "2020-01-01T00:00:00Z")])
+    ):
+        store.sync(redmine, "project")
+
+    updated = issue(1, "2020-02-01T00:00:00Z", subject="Renamed")
+    with patch.object(Redmine, "iter_resource", return_value=iter([updated])) as mock:
+        assert store.sync(redmine, "project") == 1
+
+    assert mock.call_args[1]["updated_on"] == ">=2020-01-01T00:00:00Z"
+    assert store.issue(1)["subject"] == "Renamed"
+    assert store.watermark("project") == "2020-02-01T00:00:00Z"
+
+
+def test_sync_with_journals_and_load_issue_from_row():
+    store = IssueStore(":memory:")
+    journal = {
+        "id": 10,
+        "user": {"id": 5, "name": "Alice"},
+        "notes": "Looking into it",
+        "created_on": "2020-01-01T00:00:00Z",
+        "details": [],
+    }
+    full = issue(1, "2020-01-01T00:00:00Z", journals=[journal])
+
+    with patch.object(
+        Redmine, "iter_resource", return_value=iter([issue(1, "2020-01-01T00:00:00Z")])
+    ):
+        with patch.object(Redmine, "get_issue", return_value=full) as mock_get_issue:
+            store.sync(redmine, "project", journals=True)
+
+    mock_get_issue.assert_called_once_with(1, journals=True)
+    assert "journals" not in store.issue(1)["data"]
+
+    loaded = Issue.from_row(store.issue(1), store.journals(1))
+    assert loaded.id == 1
+    assert loaded.assigned_to["name"] == "Bob"
+    assert loaded.journals == [journal]
+
+
+def populated_store():
+    store = IssueStore(":memory:")
+    store.set_meta("current_user", 6)
+    store.set_meta(
+        "statuses",
+        [{"id": 3, "name": "New"}, {"id": 5, "name": "Closed", "is_closed": True}],
+    )
+    store.set_meta(
+        "projects",
+        [
+            {"id": 1, "identifier": "parent", "name": "Parent"},
+            {"id": 7, "identifier": "child", "name": "Child", "parent": {"id": 1}},
+            {"id": 8, "identifier": "other", "name": "Other"},
+        ],
+    )
+    store.upsert_issues(
+        [
+            issue(1, "2020-01-01T10:00:00Z"),
+            issue(2, "2020-01-02T10:00:00Z", status={"id": 5, "name": "Closed"}),
+            issue(3, "2020-01-03T10:00:00Z", assigned_to=None),
+            issue(4, "2020-01-04T10:00:00Z", project={"id": 7, "name": "Child"}),
+            issue(5, "2020-01-05T10:00:00Z", project={"id": 8, "name": "Other"}),
+        ]
+    )
+    return store
+
+
+def ids(rows):
+    return [row["id"] for row in rows]
+
+
+def test_query_defaults_to_open_issues_by_id_desc():
+    assert ids(populated_store().query()) == [5, 4, 3, 1]
+
+
+def test_query_status():
+    store = populated_store()
+
+    assert ids(store.query(status="closed")) == [2]
+    assert ids(store.query(status="*", sort="id")) == [1, 2, 3, 4, 5]
+    assert ids(store.query(status="3|5", limit=2)) == [5, 4]
+
+
+def test_query_assignee():
+    store = populated_store()
+
+    assert ids(store.query(assignee="me")) == [5, 4, 1]
+    assert ids(store.query(assignee="!*")) == [3]
+
+
+def test_query_project_includes_subprojects():
+    store = populated_store()
+
+    assert ids(store.query(project="parent")) == [4, 3, 1]
+    assert ids(store.query(project="7")) == [4]
+
+
+def test_query_dates():
+    store = populated_store()
+
+    assert ids(store.query(updated_after="2020-01-04")) == [5, 4]
+    assert ids(store.query(updated_before="2020-01-03")) == [3, 1]
+    assert ids(store.query(updated_on="2020-01-03")) == [3]
+    assert ids(store.query(created_on="><2020-01-01|2020-01-02")) == [5, 4, 3, 1]
+
+
+def test_query_sort_and_issue_ids():
+    store = populated_store()
+
+    assert ids(store.query(sort="updated_on:desc", limit=1)) == [5]
+    assert ids(store.query(issue_id="2,3", sort="id")) == [2, 3]
+
+
+def test_query_rejects_saved_queries():
+    with pytest.raises(ValueError):
+        populated_store().query(query="12")
+
+
+def test_search_ranks_subject_matches_first():
+    store = IssueStore(":memory:")
+    store.upsert_journals(
+        1, [{"id": 10, "notes": "Broken json output", "created_on": "2020"}]
+    )
+    store.upsert_issues(
+        [
+            issue(1, "2020-01-01T00:00:00Z", subject="Crash on start"),
+            issue(2, "2020-01-01T00:00:00Z", subject="Fix JSON output"),
+            issue(3, "2020-01-01T00:00:00Z", description="json: output is empty"),
+            issue(4, "2020-01-01T00:00:00Z", subject="Unrelated"),
+        ]
+    )
+
+    assert ids(store.search("json output")) == [2, 3, 1]
+    assert ids(store.search("json output", limit=1)) == [2]
+    assert ids(store.search("nothing")) == []
+
+
+def test_search_index_follows_updates():
+    store = IssueStore(":memory:")
+    store.upsert_issues([issue(1, "2020-01-01T00:00:00Z", subject="Old title")])
+    store.upsert_issues([issue(1, "2020-01-02T00:00:00Z", subject="New title")])
+
+    assert ids(store.search("old")) == []
+    assert ids(store.search("new")) == [1]
+
+
+def test_reopening_store_writes_nothing(tmp_path):
+    path = str(tmp_path / "issues.db")
+    store = IssueStore(path)
+    store.upsert_issues([issue(1, "2020-01-01T00:00:00Z", subject="JSON output")])
+    store.upsert_issues([issue(2, "2020-01-01T00:00:00Z", description="json")])
+    store.db.commit()
+    store.db.close()
+
+    store = IssueStore(path)
+
+    assert store.db.total_changes == 0
+    # The rank set when the index was created still applies
+    assert ids(store.search("json")) == [1, 2]
+
+
+class UpdatingRedmine(FakeRedmine):
+    """ Updates the first issue in the middle of a sync, after its first page """
+
+    def list_issues(self, params, body):
+        status, data = super().list_issues(params, body)
+        if not self.requests[:-1]:
+            issue = self.data["issues"][0]
+            issue["updated_on"] = "2020-04-01T10:00:00Z"
+            issue["subject"] = "Updated mid-sync"
+        return status, data
+
+
+def test_sync_pages_by_updated_on(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    store = IssueStore(":memory:")
+
+    with UpdatingRedmine(issues=250) as server:
+        redmine = Redmine(server.url, "API_KEY")
+        store.sync(redmine, "1")
+        synced = ids(store.query(status="*", sort="id"))
+
+        server.data["issues"][100]["updated_on"] = "2020-04-02T10:00:00Z"
+        assert store.sync(redmine, "1") == 2
+
+    # Paging by offset missed the issue the update pushed across a page boundary
+    assert synced == list(range(1, 251))
+    assert store.issue(1)["subject"] == "Updated mid-sync"
+    assert store.watermark("1") == "2020-04-02T10:00:00Z"
+    first_page = server.requests[0][2]
+    assert first_page["sort"] == "updated_on:asc"
+    assert all(params["offset"] == "0" for _, _, params in server.requests)
@@ -0,0 +1,137 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from unittest.mock import PropertyMock, patch
+
+from redmine import cache
+from redmine.redmine import Redmine
+
+from ..server import FakeRedmine
+
+redmine = Redmine("http://example.com", "API_KEY", workers=4)
+
+MEMBERSHIPS = {
+    "projects/1/memberships": [
+        {"id": 1, "user": {"id": 10, "name": "Alice"}},
+        {"id": 2, "group": {"id": 20, "name": "Developers"}},
+    ],
+    "projects/2/memberships": [
+        {"id": 3, "user": {"id": 10, "name": "Alice"}},
+        {"id": 4, "user": {"id": 11, "name": "Bob"}},
+        {"id": 5, "group_anonymous": {"id": 12, "name": "Anonymous"}},
+    ],
+    "projects/3/memberships": [],
+}
+
+
+def test_crawl_users_merges_memberships_of_all_projects():
+    projects = [{"id": 1}, {"id": 2}, {"id": 3}]
+
+    def revalidate(cache_file, resource, **kwargs):
+        return {"memberships": MEMBERSHIPS[resource]}
+
+    with patch.object(Redmine, "projects", new_callable=PropertyMock) as mock_projects:
+        mock_projects.return_value = projects
+        with patch.object(Redmine, "revalidate", side_effect=revalidate):
+            users = redmine.crawl_users()
+
+    assert users == {
+        "10": "Alice",
+        "11": "Bob",
+        "12": "Anonymous",
+        "20": "Developers",
+    }
+
+
+def test_membership_names_prefers_user_over_group():
+    memberships = [{"user": {"id": 1, "name": "Alice"}, "group": {"id": 2}}]
+
+    assert Redmine.membership_names(memberships) == {"1": "Alice"}
+
+
+def test_sync_users_downloads_only_changed_memberships(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    monkeypatch.setattr(FakeRedmine, "list_users", lambda *args, **kwargs: (403, None))
+
+    with FakeRedmine(projects=2, users=3) as server:
+        redmine = Redmine(server.url, "API_KEY")
+        users = redmine.sync_users(progress=False)
+        assert users == {"1": "User 1", "2": "User 2", "3": "User 3"}
+
+        # Adding a member leaves the project's updated_on as it was
+        server.data["memberships"][2].append(
+            {"id": 9, "project": {"id": 2}, "user": {"id": 13, "name": "Carol"}}
+        )
+        server.requests.clear()
+        users = redmine.sync_users(progress=False)
+
+    membership_requests = [path for _, path, _ in server.requests if "members" in path]
+    assert sorted(membership_requests) == [
+        "/projects/1/memberships.json",
+        "/projects/2/memberships.json",
+        "/projects/2/memberships.json",
+    ]
+    # Project 1 answered 304, project 2 was downloaded again
+    assert server.counts["not_modified"] == 1
+    assert users["13"] == "Carol"
+    assert redmine.get_users() == users
+
+
+def test_sync_users_with_admin_key_asks_for_updated_users(tmp_path):
+    redmine = Redmine("http://example.com", "API_KEY")
+    redmine.cache_dir = str(tmp_path)
+    calls = []
+
+    def iter_resource(resource, **kwargs):
+        calls.append((resource, kwargs))
+        if resource == "users":
+            return iter([{"id": 10, "firstname": "Alice", "lastname": "Smith"}])
+        return iter([{"id": 20, "name": "Developers"}])
+
+    with patch.object(Redmine, "iter_resource", side_effect=iter_resource):
+        redmine.sync_users()
+        users = redmine.sync_users()
+
+    assert users == {"10": "Alice Smith", "20": "Developers"}
+    assert calls[0] == ("users", {"workers": None})
+    assert calls[2][0] == "users"
+    assert calls[2][1]["updated_on"].startswith(">=")
+
+
+def test_stale_users_are_refreshed_before_a_command_exits(tmp_path, monkeypatch):
+    # The refresh runs in a daemon thread of a short command, so it must not
+    # need a thread pool: concurrent.futures refuses them at shutdown.
+    monkeypatch.setattr(FakeRedmine, "list_users", lambda *args, **kwargs: (403, None))
+
+    with FakeRedmine(projects=3, users=3) as server:
+        cache_dir = tmp_path / ".cache/redmine" / cache.namespace(server.url, "KEY")
+        cache_dir.mkdir(parents=True)
+        users_file = cache_dir / "users.json"
+        users_file.write_text(json.dumps({"1": "Old name"}))
+        two_days_ago = time.time() - 2 * cache.DAY
+        os.utime(str(users_file), (two_days_ago, two_days_ago))
+
+        env = {
+            **os.environ,
+            "HOME": str(tmp_path),
+            "REDMINE_URL": server.url,
+            "REDMINE_API_KEY": "KEY",
+        }
+        result = subprocess.run(
+            [sys.executable, "-c", "from redmine.cli.main import cli; cli()"]
+            + ["--workers", "4", "list", "user"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            universal_newlines=True,
+            env=env,
+        )
+
+    assert result.returncode == 0
+    assert "Old name" in result.stdout
+    assert result.stderr == ""
+    membership_requests = [path for _, path, _ in server.requests if "members" in path]
+    assert len(membership_requests) == 3
+    assert json.loads(users_file.read_text())["1"] == "User 1"
+    assert cache.state(str(users_file), "users") == cache.FRESH
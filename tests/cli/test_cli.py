@@ -0,0 +1,44 @@
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+# Cumulative import time allowed for redmine.cli.main. Shell completion and
+# --help pay it on every run, so stay far below what a human notices. It's
+# about 65 ms now, most of it click, so a 20% regression fails.
+IMPORT_BUDGET_MS = int(os.getenv("REDMINE_IMPORT_BUDGET_MS", 80))
+
+# Only needed once a command talks to the server or the local store
+LAZY_MODULES = ["requests", "sqlite3", "redmine.redmine", "redmine.store"]
+
+
+def python(*args):
+    return subprocess.run(
+        [sys.executable, *args],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+
+def test_cli_does_not_import_lazy_modules():
+    result = python("-c", "import sys, redmine.cli.main; print(*sys.modules)")
+    modules = set(result.stdout.split())
+
+    assert [m for m in LAZY_MODULES if m in modules] == []
+
+
+@pytest.mark.skipif(sys.version_info < (3, 7), reason="-X importtime needs 3.7")
+def test_cli_import_time():
+    def import_time():
+        result = python("-X", "importtime", "-c", "import redmine.cli.main")
+        line = result.stderr.strip().splitlines()[-1]
+        return int(re.match(r"import time:\s+\d+ \|\s+(\d+) \|", line).group(1))
+
+    # Best of a few runs so a busy machine doesn't fail the test
+    best = min(import_time() for _ in range(5)) / 1000
+
+    assert best < IMPORT_BUDGET_MS, f"redmine.cli.main took {best:.0f} ms to import"
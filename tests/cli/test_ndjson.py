@@ -0,0 +1,66 @@
+import json
+from collections import defaultdict
+
+import pytest
+from click.testing import CliRunner
+
+from redmine.cli.main import cli
+
+from ..server import FakeRedmine
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+    with FakeRedmine(issues=250, users=3, time_entries=120) as server:
+        yield server
+
+
+def redmine(server, *args):
+    env = {"REDMINE_URL": server.url, "REDMINE_API_KEY": "API_KEY"}
+    result = CliRunner().invoke(cli, args, env=env)
+    assert result.exit_code == 0, result.output
+    return result.output
+
+
+def lines(output):
+    return [json.loads(line) for line in output.splitlines()]
+
+
+def test_issues_ndjson_respects_limit_across_pages(server):
+    issues = lines(redmine(server, "issues", "--ndjson", "--limit", "150"))
+
+    assert [i["id"] for i in issues] == list(range(250, 100, -1))
+    assert issues[0]["subject"] == "Issue 250"
+
+
+def test_offline_issues_ndjson(server):
+    redmine(server, "sync", "1")
+    output = redmine(
+        server, "issues", "--offline", "--ndjson", "--status", "*", "--limit", "120"
+    )
+    issues = lines(output)
+
+    assert [i["id"] for i in issues] == list(range(250, 130, -1))
+    assert issues[0] == {
+        k: v for k, v in server.data["issues"][-1].items() if k != "journals"
+    }
+
+
+def test_times_ndjson(server):
+    entries = lines(redmine(server, "times", "--ndjson"))
+
+    assert [e["id"] for e in entries] == list(range(1, 121))
+
+
+def test_times_ndjson_summary(server):
+    output = redmine(server, "times", "--group-by", "user", "--sum", "--ndjson")
+    *rows, total = lines(output)
+
+    hours = defaultdict(float)
+    for entry in server.data["time_entries"]:
+        hours[entry["user"]["name"]] += entry["hours"]
+    assert rows == [
+        {"user": name, "hours": round(hours[name], 2)} for name in sorted(hours)
+    ]
+    assert total == {"hours": round(sum(hours.values()), 2)}
@@ -0,0 +1,24 @@
+import pytest
+from click.testing import CliRunner
+
+from redmine.cli.main import cli
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["issues", "--offline"],
+        ["issues", "--offline", "--assignee", "me"],
+        ["search", "json"],
+    ],
+)
+def test_offline_commands_need_a_sync(tmp_path, args):
+    env = {
+        "HOME": str(tmp_path),
+        "REDMINE_URL": "http://example.com",
+        "REDMINE_API_KEY": "API_KEY",
+    }
+    result = CliRunner().invoke(cli, args, env=env)
+
+    assert result.exit_code == 1
+    assert result.output == "Fatal: run `redmine sync` first\n"
@@ -0,0 +1,18 @@
+from click.testing import CliRunner
+
+from redmine.cli.main import cli
+
+from ..server import FakeRedmine
+
+
+def test_show_reports_obsolete_cache_before_writing(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", str(tmp_path))
+
+    with FakeRedmine(issues=1, journals=2) as server:
+        # A status added after the statuses were cached
+        server.data["issues"][0]["journals"][1]["details"][0]["new_value"] = "9"
+        env = {"REDMINE_URL": server.url, "REDMINE_API_KEY": "API_KEY"}
+        result = CliRunner().invoke(cli, ["show", "1", "--no-pager"], env=env)
+
+    assert result.exit_code == 0
+    assert result.output == "Cache is obsolete. Run with --force.\n"
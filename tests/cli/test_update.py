@@ -0,0 +1,45 @@
+from unittest.mock import patch
+
+from click.testing import CliRunner
+from requests.exceptions import HTTPError
+
+from redmine.cli.main import cli
+from redmine.redmine import Redmine
+
+from ..api.response import MockResponse
+
+
+def update(args, tmp_path):
+    """ Run update against a server answering 502 to the first PUT """
+    calls = []
+
+    def update_issue(self, issue_id, **kwargs):
+        calls.append(issue_id)
+        if len(calls) == 1:
+            raise HTTPError(response=MockResponse(502, {}))
+        return True
+
+    env = {
+        "HOME": str(tmp_path),
+        "REDMINE_URL": "http://example.com",
+        "REDMINE_API_KEY": "API_KEY",
+    }
+    with patch.object(Redmine, "update_issue", update_issue), patch("time.sleep"):
+        result = CliRunner().invoke(cli, ["update", "12", *args], env=env)
+
+    return result, calls
+
+
+def test_update_retries_server_errors(tmp_path):
+    result, calls = update(["--status", "2"], tmp_path)
+
+    assert result.exit_code == 0
+    assert calls == ["12", "12"]
+
+
+def test_update_with_note_is_not_retried(tmp_path):
+    # The note may have been added before the proxy answered 502
+    result, calls = update(["--note", "Done"], tmp_path)
+
+    assert result.exit_code == 1
+    assert calls == ["12"]
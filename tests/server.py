@@ -0,0 +1,575 @@
+"""
+A stand-in Redmine for tests and benchmarks: a real HTTP/1.1 server on
+localhost that answers the JSON API endpoints the client uses, with paging
+and total_count like Redmine, plus knobs for latency, failures and rate
+limiting.
+
+    with FakeRedmine(issues=500, latency=0.01) as server:
+        redmine = Redmine(server.url, "API_KEY")
+
+It can also be run on its own, to point the CLI at it:
+
+    $ python -m tests.server --port 3000 --issues 5000 --latency 0.05
+    $ REDMINE_URL=http://127.0.0.1:3000 REDMINE_API_KEY=x redmine issues
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import parse_qsl, urlparse
+
+# Largest page Redmine returns, whatever limit is asked for
+MAX_LIMIT = 100
+
+STATUSES = [
+    {"id": 1, "name": "New", "is_closed": False},
+    {"id": 2, "name": "In Progress", "is_closed": False},
+    {"id": 3, "name": "Resolved", "is_closed": False},
+    {"id": 5, "name": "Closed", "is_closed": True},
+]
+PRIORITIES = [{"id": i, "name": n} for i, n in enumerate(["Low", "Normal", "High"], 1)]
+ACTIVITIES = [{"id": 9, "name": "Design"}, {"id": 10, "name": "Development"}]
+TRACKERS = [{"id": 1, "name": "Bug"}, {"id": 2, "name": "Feature"}]
+
+
+def generate(issues=0, projects=1, users=10, journals=0, time_entries=0):
+    """ Deterministic Redmine data, keyed like the resources it's served as """
+    rng = random.Random(0)
+
+    def ref(items):
+        item = rng.choice(items)
+        return {"id": item["id"], "name": item["name"]}
+
+    project_list = [
+        {
+            "id": i,
+            "name": f"Project {i}",
+            "identifier": f"project-{i}",
+            "updated_on": "2020-03-01T09:00:00Z",
+        }
+        for i in range(1, projects + 1)
+    ]
+    # As /users.json lists them, other resources refer to them by full name
+    user_list = [
+        {"id": i, "login": f"user{i}", "firstname": "User", "lastname": str(i)}
+        for i in range(1, users + 1)
+    ]
+    user_refs = [{"id": u["id"], "name": f"User {u['id']}"} for u in user_list]
+
+    issue_list = []
+    for i in range(1, issues + 1):
+        day = i % 28 + 1
+        issue_list.append(
+            {
+                "id": i,
+                "project": ref(project_list),
+                "tracker": ref(TRACKERS),
+                "status": ref(STATUSES),
+                "priority": ref(PRIORITIES),
+                "author": ref(user_refs),
+                "assigned_to": ref(user_refs),
+                "subject": f"Issue {i}",
+                "description": f"Description of issue {i}",
+                "start_date": f"2020-03-{day:02}",
+                "due_date": None,
+                "done_ratio": rng.choice([0, 50, 100]),
+                "created_on": f"2020-03-{day:02}T09:00:00Z",
+                "updated_on": f"2020-03-{day:02}T10:00:00Z",
+                "journals": [
+                    {
+                        "id": i * 1000 + j,
+                        "user": ref(user_refs),
+                        "notes": f"Note {j}",
+                        "created_on": f"2020-03-{day:02}T11:00:00Z",
+                        "details": [
+                            {
+                                "property": "attr",
+                                "name": "status_id",
+                                "old_value": "1",
+                                "new_value": "2",
+                            }
+                        ],
+                    }
+                    for j in range(1, journals + 1)
+                ],
+            }
+        )
+
+    memberships = {
+        p["id"]: [
+            {"id": p["id"] * 1000 + u["id"], "project": p, "user": u}
+            for u in user_refs
+        ]
+        for p in project_list
+    }
+
+    entries = [
+        {
+            "id": i,
+            "project": ref(project_list),
+            "issue": {"id": rng.randint(1, max(issues, 1))},
+            "user": ref(user_refs),
+            "activity": ref(ACTIVITIES),
+            "hours": rng.choice([0.5, 1.0, 2.0, 4.0]),
+            "comments": "",
+            "spent_on": f"2020-03-{i % 28 + 1:02}",
+        }
+        for i in range(1, time_entries + 1)
+    ]
+
+    return {
+        "issues": issue_list,
+        "projects": project_list,
+        "users": user_list,
+        "groups": [{"id": users + 1, "name": "Developers"}],
+        "memberships": memberships,
+        "time_entries": entries,
+    }
+
+
+class Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Send headers and body in one segment, otherwise Nagle and delayed ACKs
+    # add ~40ms to every keep-alive response.
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.fake.count("connections")
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def do_PUT(self):
+        self.dispatch("PUT")
+
+    def dispatch(self, method):
+        fake = self.server.fake
+        url = urlparse(self.path)
+        params = dict(parse_qsl(url.query))
+        length = int(self.headers.get("Content-Length") or 0)
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        status, data, headers = fake.handle(
+            method, url.path, params, body, self.headers
+        )
+
+        content = b"" if data is None else json.dumps(data).encode()
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+
+class FakeRedmine:
+    """
+    Serve generate()'s data (or data given as keyword arguments) until stop.
+
+    latency is added to every request, error_rate is the share of requests
+    answered with 503, and rate_limit is the number of requests a second
+    served before answering 429 with a Retry-After.
+    """
+
+    ROUTES = [
+        ("GET", r"/issues", "list_issues"),
+        ("GET", r"/issues/(\d+)", "show_issue"),
+        ("POST", r"/issues", "create_issue"),
+        ("PUT", r"/issues/(\d+)", "update_issue"),
+        ("GET", r"/projects", "list_projects"),
+        ("GET", r"/projects/([^/]+)/memberships", "list_memberships"),
+        ("GET", r"/time_entries", "list_time_entries"),
+        ("POST", r"/time_entries", "create_time_entry"),
+        ("GET", r"/users", "list_users"),
+        ("GET", r"/users/current", "current_user"),
+        ("GET", r"/groups", "list_groups"),
+        ("GET", r"/issue_statuses", "list_statuses"),
+        ("GET", r"/trackers", "list_trackers"),
+        ("GET", r"/enumerations/issue_priorities", "list_priorities"),
+        ("GET", r"/enumerations/time_entry_activities", "list_activities"),
+    ]
+
+    def __init__(
+        self,
+        port=0,
+        latency=0,
+        error_rate=0,
+        rate_limit=None,
+        seed=0,
+        data=None,
+        **sizes,
+    ):
+        self.data = data or generate(**sizes)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.random = random.Random(seed)
+        self.counts = {
+            "connections": 0,
+            "requests": 0,
+            "errors": 0,
+            "throttled": 0,
+            "not_modified": 0,
+        }
+        self.requests = []
+        self.lock = threading.Lock()
+        self.window = (0, 0)
+
+        self.routes = [
+            (method, re.compile(f"{pattern}\\.json$"), getattr(self, name))
+            for method, pattern, name in self.ROUTES
+        ]
+
+        self.httpd = Server(("127.0.0.1", port), Handler)
+        self.httpd.fake = self
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def start(self):
+        # Short poll so stop doesn't hold up every test for half a second
+        threading.Thread(
+            target=self.httpd.serve_forever, args=(0.05,), daemon=True
+        ).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def count(self, name):
+        with self.lock:
+            self.counts[name] += 1
+
+    def throttled(self):
+        """ Whether this request goes over rate_limit in the current second """
+        if self.rate_limit is None:
+            return False
+
+        with self.lock:
+            second, served = self.window
+            now = int(time.monotonic())
+            if now != second:
+                second, served = now, 0
+            self.window = (second, served + 1)
+            return served >= self.rate_limit
+
+    def handle(self, method, path, params, body, headers):
+        """ Return status, data and headers answering a request """
+        self.count("requests")
+        with self.lock:
+            self.requests.append((method, path, params))
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if self.throttled():
+            self.count("throttled")
+            return 429, None, {"Retry-After": "1"}
+
+        with self.lock:
+            failed = self.random.random() < self.error_rate
+        if failed:
+            self.count("errors")
+            return 503, None, {}
+
+        for route_method, pattern, view in self.routes:
+            match = pattern.match(path)
+            if route_method == method and match:
+                break
+        else:
+            return 404, None, {}
+
+        status, data = view(*match.groups(), params=params, body=body)
+        if status != 200:
+            return status, data, {}
+
+        # Validators like Redmine's (Rails' ETag middleware) so conditional
+        # requests get 304 while data doesn't change.
+        digest = hashlib.md5(json.dumps(data, sort_keys=True).encode()).hexdigest()
+        etag = f'W/"{digest}"'
+        if headers.get("If-None-Match") == etag:
+            self.count("not_modified")
+            return 304, None, {"ETag": etag}
+
+        return 200, data, {"ETag": etag}
+
+    def page(self, name, items, params):
+        offset = int(params.get("offset", 0))
+        limit = min(int(params.get("limit", 25)), MAX_LIMIT)
+
+        return 200, {
+            name: items[offset:offset + limit],
+            "total_count": len(items),
+            "offset": offset,
+            "limit": limit,
+        }
+
+    def list_issues(self, params, body):
+        issues = self.data["issues"]
+
+        if params.get("issue_id"):
+            ids = {int(i) for i in params["issue_id"].split(",")}
+            issues = [i for i in issues if i["id"] in ids]
+        if params.get("project_id"):
+            project = self.project(params["project_id"])
+            issues = [i for i in issues if project and i["project"]["id"] == project]
+        if params.get("assigned_to_id"):
+            assignee = int(params["assigned_to_id"])
+            issues = [i for i in issues if i["assigned_to"]["id"] == assignee]
+        if params.get("status_id") not in (None, "*"):
+            closed = {s["id"] for s in STATUSES if s["is_closed"]}
+            if params["status_id"] == "open":
+                issues = [i for i in issues if i["status"]["id"] not in closed]
+            elif params["status_id"] == "closed":
+                issues = [i for i in issues if i["status"]["id"] in closed]
+            else:
+                status = int(params["status_id"])
+                issues = [i for i in issues if i["status"]["id"] == status]
+
+        if params.get("updated_on"):
+            updated_on = params["updated_on"]
+            issues = [i for i in issues if matches(i["updated_on"], updated_on)]
+        if params.get("sort"):
+            issues = sort(issues, params["sort"])
+
+        issues = [{k: v for k, v in i.items() if k != "journals"} for i in issues]
+        return self.page("issues", issues, params)
+
+    def show_issue(self, issue_id, params, body):
+        for issue in self.data["issues"]:
+            if issue["id"] == int(issue_id):
+                break
+        else:
+            return 404, None
+
+        if "journals" not in params.get("include", ""):
+            issue = {k: v for k, v in issue.items() if k != "journals"}
+
+        return 200, {"issue": issue}
+
+    def create_issue(self, params, body):
+        fields = body.get("issue", {})
+        if not fields.get("subject"):
+            return 422, {"errors": ["Subject cannot be blank"]}
+
+        now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        issue = {
+            "subject": fields["subject"],
+            "description": fields.get("description") or "",
+            "start_date": fields.get("start_date"),
+            "due_date": fields.get("due_date"),
+            "done_ratio": int(fields.get("done_ratio") or 0),
+            "created_on": now,
+            "updated_on": now,
+            "journals": [],
+        }
+
+        # Nested like show_issue answers, ids given or Redmine's defaults
+        people = self.data["users"] + self.data["groups"]
+        project_id = self.project(fields.get("project_id"))
+        references = {
+            "project": (self.data["projects"], project_id),
+            "tracker": (TRACKERS, fields.get("tracker_id") or TRACKERS[0]["id"]),
+            "status": (STATUSES, fields.get("status_id") or STATUSES[0]["id"]),
+            "priority": (PRIORITIES, fields.get("priority_id") or 2),
+            "author": (people, self.data["users"][0]["id"]),
+            "assigned_to": (people, fields.get("assigned_to_id")),
+        }
+        for name, (items, item_id) in references.items():
+            if item_id is None and name == "assigned_to":
+                continue
+            issue[name] = self.reference(items, item_id)
+            if issue[name] is None:
+                return 422, {"errors": [f"{name.capitalize()} is invalid"]}
+
+        if fields.get("parent_issue_id"):
+            issue["parent"] = {"id": int(fields["parent_issue_id"])}
+
+        with self.lock:
+            issue["id"] = len(self.data["issues"]) + 1
+            self.data["issues"].append(issue)
+
+        return 201, {"issue": {k: v for k, v in issue.items() if k != "journals"}}
+
+    def reference(self, items, item_id):
+        """ {"id": ..., "name": ...} of the item with item_id, None if missing """
+        for item in items:
+            if str(item["id"]) == str(item_id):
+                name = item.get("name") or f"{item['firstname']} {item['lastname']}"
+                return {"id": item["id"], "name": name}
+
+    def update_issue(self, issue_id, params, body):
+        for issue in self.data["issues"]:
+            if issue["id"] == int(issue_id):
+                return 204, None
+
+        return 404, None
+
+    def list_projects(self, params, body):
+        return self.page("projects", self.data["projects"], params)
+
+    def project(self, id_or_identifier):
+        id_or_identifier = str(id_or_identifier)
+        for p in self.data["projects"]:
+            if str(p["id"]) == id_or_identifier or p["identifier"] == id_or_identifier:
+                return p["id"]
+
+    def list_memberships(self, project, params, body):
+        project_id = self.project(project)
+        if project_id is None:
+            return 404, None
+
+        return self.page("memberships", self.data["memberships"][project_id], params)
+
+    def list_time_entries(self, params, body):
+        entries = self.data["time_entries"]
+
+        if params.get("user_id"):
+            user = params["user_id"]
+            entries = [e for e in entries if str(e["user"]["id"]) == user]
+        if params.get("project_id"):
+            project = self.project(params["project_id"])
+            entries = [e for e in entries if e["project"]["id"] == project]
+        if params.get("from"):
+            entries = [e for e in entries if e["spent_on"] >= params["from"]]
+        if params.get("to"):
+            entries = [e for e in entries if e["spent_on"] <= params["to"]]
+
+        return self.page("time_entries", entries, params)
+
+    def create_time_entry(self, params, body):
+        fields = body.get("time_entry", {})
+        if not fields.get("hours"):
+            return 422, {"errors": ["Hours cannot be blank"]}
+
+        with self.lock:
+            entry = {
+                "id": len(self.data["time_entries"]) + 1,
+                "project": self.data["projects"][0],
+                "issue": {"id": int(fields.get("issue_id", 0))},
+                "user": {"id": 1, "name": "User 1"},
+                "activity": ACTIVITIES[0],
+                "hours": float(fields["hours"]),
+                "comments": fields.get("comments") or "",
+                "spent_on": fields.get("spent_on") or time.strftime("%Y-%m-%d"),
+            }
+            self.data["time_entries"].append(entry)
+
+        return 201, {"time_entry": entry}
+
+    def list_users(self, params, body):
+        return self.page("users", self.data["users"], params)
+
+    def list_groups(self, params, body):
+        return self.page("groups", self.data["groups"], params)
+
+    def current_user(self, params, body):
+        return 200, {"user": self.data["users"][0]}
+
+    def list_statuses(self, params, body):
+        return 200, {"issue_statuses": STATUSES}
+
+    def list_trackers(self, params, body):
+        return 200, {"trackers": TRACKERS}
+
+    def list_priorities(self, params, body):
+        return 200, {"issue_priorities": PRIORITIES}
+
+    def list_activities(self, params, body):
+        return 200, {"time_entry_activities": ACTIVITIES}
+
+
+def matches(timestamp, condition):
+    """ Whether timestamp meets a date filter like >=2020-03-01T10:00:00Z """
+    if condition.startswith("><"):
+        low, high = condition[2:].split("|")
+        return matches(timestamp, ">=" + low) and matches(timestamp, "<=" + high)
+
+    operator, value = condition[:2], condition[2:]
+    if operator not in (">=", "<="):
+        operator, value = "=", condition
+    # A date compares with the day of the timestamp, so it includes the whole day
+    if len(value) == 10:
+        timestamp = timestamp[:10]
+
+    if operator == ">=":
+        return timestamp >= value
+    if operator == "<=":
+        return timestamp <= value
+    return timestamp == value
+
+
+def sort(issues, criteria):
+    """ Issues ordered like sort=updated_on:asc,id, ties by id desc like Redmine """
+
+    def value(issue, name):
+        value = issue.get(name)
+        if isinstance(value, dict):
+            value = value["id"]
+        # Empty values (i.e due_date) last, without comparing None
+        return value is None, value
+
+    issues = sorted(issues, key=lambda i: i["id"], reverse=True)
+    for term in reversed(criteria.split(",")):
+        name, _, direction = term.partition(":")
+        issues.sort(key=lambda i: value(i, name), reverse=direction == "desc")
+
+    return issues
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--issues", type=int, default=1000)
+    parser.add_argument("--projects", type=int, default=10)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--journals", type=int, default=5)
+    parser.add_argument("--time-entries", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0, help="Seconds")
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--rate-limit", type=int, default=None, help="Per second")
+    args = parser.parse_args()
+
+    server = FakeRedmine(
+        port=args.port,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        issues=args.issues,
+        projects=args.projects,
+        users=args.users,
+        journals=args.journals,
+        time_entries=args.time_entries,
+    )
+    print(f"Serving a fake Redmine on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
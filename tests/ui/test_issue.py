@@ -0,0 +1,54 @@
+import pytest
+
+from redmine.issue import Issue
+from redmine.journal import JournalContext
+
+ISSUE = {
+    "id": 12,
+    "subject": "Fix json output",
+    "project": {"id": 88, "name": "CLI"},
+    "tracker": {"id": 1, "name": "Bug"},
+    "status": {"id": 1, "name": "New"},
+    "priority": {"id": 2, "name": "Normal"},
+    "author": {"id": 5, "name": "Jane Doe"},
+    "assigned_to": {"id": 6, "name": "John Doe"},
+    "created_on": "2020-03-02T09:15:00Z",
+    "description": "Output is not valid JSON",
+    "done_ratio": 0,
+    "journals": [
+        {
+            "user": {"id": 5, "name": "Jane Doe"},
+            "created_on": f"2020-03-0{day}T10:00:00Z",
+            "notes": f"Note {day}",
+            "details": [],
+        }
+        for day in (3, 4)
+    ],
+}
+
+
+def test_issue_render_yields_header_then_journals():
+    issue = Issue(**ISSUE, context=JournalContext())
+    pieces = list(issue.render())
+
+    assert len(pieces) == 3
+    assert pieces[0].startswith("Issue #12 - Fix json output\n\n")
+    assert pieces[1] == "\n• 2020-03-03 10:00 Jane Doe\n\n\tNote 3\n"
+    assert "".join(pieces) == str(issue)
+    assert str(issue) == issue.get_header() + issue.get_journals()
+
+
+def test_issue_as_row():
+    row = Issue(**ISSUE).as_row()
+
+    assert row.startswith(f"{12:>6} {'CLI':21} {'Normal':<8} {'New':<19}   0% ")
+
+
+def test_issue_check_raises_for_unknown_names():
+    detail = {"property": "attr", "name": "status_id", "old_value": "1"}
+    journal = {**ISSUE["journals"][0], "details": [{**detail, "new_value": "9"}]}
+    context = JournalContext(statuses=[{"id": 1, "name": "New"}])
+
+    Issue(**ISSUE, context=context).check()
+    with pytest.raises(KeyError):
+        Issue(**{**ISSUE, "journals": [journal]}, context=context).check()
@@ -0,0 +1,49 @@
+from redmine.journal import Journal, JournalContext, render_journals
+
+CONTEXT = JournalContext(
+    statuses=[{"id": 1, "name": "New"}, {"id": 2, "name": "In Progress"}],
+    priorities=[{"id": 2, "name": "Normal"}],
+    users={"5": "Jane Doe", "6": "John Doe"},
+)
+
+JOURNAL = {
+    "user": {"id": 5, "name": "Jane Doe"},
+    "created_on": "2020-03-02T10:05:00Z",
+    "notes": "Looks good",
+    "details": [
+        {"property": "attr", "name": "status_id", "old_value": "1", "new_value": "2"},
+        {
+            "property": "attr",
+            "name": "assigned_to_id",
+            "old_value": "5",
+            "new_value": "6",
+        },
+        {"property": "attr", "name": "done_ratio", "new_value": "50"},
+        {"property": "attr", "name": "due_date", "old_value": "2020-03-09"},
+        {"property": "cf", "name": "3", "new_value": "high"},
+    ],
+}
+
+
+def test_journal_str():
+    assert str(Journal(**JOURNAL, context=CONTEXT)) == (
+        "\n• 2020-03-02 10:05 Jane Doe\n\n"
+        "\tLooks good\n"
+        "\t‣ Status changed from New to In Progress\n"
+        "\t‣ Assignee changed from Jane Doe to John Doe\n"
+        "\t‣ Done set to 50\n"
+        "\t‣ Due date deleted 2020-03-09\n"
+    )
+
+
+def test_journal_without_names_shows_ids():
+    details = Journal(**JOURNAL).get_details()
+
+    assert "\t‣ Status changed from 1 to 2\n" in details
+
+
+def test_render_journals_leaves_details_untouched():
+    first = render_journals([JOURNAL, JOURNAL], CONTEXT)
+
+    assert render_journals([JOURNAL, JOURNAL], CONTEXT) == first
+    assert JOURNAL["details"][0]["new_value"] == "2"
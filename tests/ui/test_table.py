@@ -0,0 +1,46 @@
+from redmine.issue import Issue
+from redmine.table import ISSUES, TIMES, Table
+from redmine.time import Time
+
+ISSUE = {
+    "id": 12,
+    "subject": "Fix json output of issues when the list is filtered by version",
+    "project": {"id": 88, "name": "Command line interface"},
+    "status": {"id": 1, "name": "New"},
+    "priority": {"id": 2, "name": "Normal"},
+    "assigned_to": {"id": 6, "name": "John Doe"},
+    "done_ratio": 50,
+}
+
+ENTRY = {
+    "project": {"id": 88, "name": "CLI"},
+    "issue": {"id": 12},
+    "user": {"id": 5, "name": "Jane Doe"},
+    "activity": {"id": 9, "name": "Development"},
+    "spent_on": "2020-03-02",
+    "hours": 1.5,
+}
+
+
+def test_table_rows_match_models():
+    unassigned = {k: v for k, v in ISSUE.items() if k != "assigned_to"}
+
+    assert Table(ISSUES).row(ISSUE) == Issue(**ISSUE).as_row()
+    assert Table(ISSUES).row(unassigned) == Issue(**unassigned).as_row()
+    assert Table(TIMES).row(ENTRY) == str(Time(**ENTRY))
+
+
+def test_table_fits_flexible_column_to_width():
+    row = Table(ISSUES, width=120).row(ISSUE)
+
+    # 85 characters of fixed columns, the subject gets the rest
+    assert len(row) == 120
+    assert row.endswith(ISSUE["subject"][:33] + "  ")
+    assert len(Table(ISSUES, width=40).row(ISSUE)) == 85 + 10 + 1
+
+
+def test_table_renders_batches():
+    blocks = list(Table(TIMES, batch_size=2).render([ENTRY] * 5))
+
+    assert [block.count("\n") for block in blocks] == [1, 1, 0]
+    assert blocks[0] == "\n".join([str(Time(**ENTRY))] * 2)
@@ -0,0 +1,52 @@
+from redmine.time import Time, TimeReport
+
+
+def entry(user, project, activity, spent_on, hours):
+    return {
+        "project": {"id": project, "name": f"Project {project}"},
+        "issue": {"id": 1},
+        "user": {"id": user, "name": f"User {user}"},
+        "activity": {"id": activity, "name": f"Activity {activity}"},
+        "spent_on": spent_on,
+        "hours": hours,
+    }
+
+
+def test_time_str():
+    time = Time(**entry(5, 88, 9, "2020-03-02", 1.5))
+
+    assert str(time) == (
+        f"{'Project 88':<21}      1 {'User 5':<21} {'Activity 9':<15} "
+        "2020-03-02     1.5 hours"
+    )
+
+
+def test_time_report_sums_per_group():
+    report = TimeReport(["week", "user"])
+    for e in [
+        entry(5, 88, 9, "2020-03-02", 1.5),
+        entry(5, 90, 9, "2020-03-08", 2.25),
+        entry(5, 88, 9, "2020-03-09", 1),
+        entry(6, 88, 9, "2020-03-03", 4),
+    ]:
+        report.add(e)
+
+    assert report.group_by == ["user", "week"]
+    assert list(report.rows()) == [
+        ({"user": "User 5", "spent_on": "2020-03-02"}, 3.75),
+        ({"user": "User 5", "spent_on": "2020-03-09"}, 1.0),
+        ({"user": "User 6", "spent_on": "2020-03-02"}, 4.0),
+    ]
+    assert report.total == 8.75
+    assert Time.format(3.75, user="User 5", spent_on="2020-03-02") == (
+        f"{'User 5':<21} 2020-03-02    3.75 hours"
+    )
+
+
+def test_time_report_rejects_unknown_groups():
+    try:
+        TimeReport(["user", "issue"])
+    except ValueError as e:
+        assert str(e) == "Can't group by issue"
+    else:
+        assert False